@@ -34,23 +34,23 @@ class TelemetryAlarmingAPIAdminTest(base.BaseAlarmingAdminTest):
                      "op": "eq",
                      "value": "test"}]
             }
-            for i in range(2):
-                cls.create_alarm(event_rule=cls.rule)
+            cls.create_alarms_bulk(2, event_rule=cls.rule)
 
     @decorators.idempotent_id('25a4db0d-6150-47d5-ba48-0009ebde9aa8')
     def test_alarm_list(self):
-        # List alarms
-        alarm_list = self.admin_client.list_alarms(query=['all_projects',
-                                                          'eq',
-                                                          'true'])
+        # List alarms until all the created ones are found
+        missing_alarms = set(self.alarm_ids)
+        for alarm in self.admin_client.iter_alarms(
+                query=['all_projects', 'eq', 'true']):
+            missing_alarms.discard(alarm['alarm_id'])
+            if not missing_alarms:
+                break
 
         # Verify created alarm in the list
-        fetched_ids = [a['alarm_id'] for a in alarm_list]
-        missing_alarms = [a for a in self.alarm_ids if a not in fetched_ids]
         self.assertEqual(0, len(missing_alarms),
                          "Failed to find the following created alarm(s)"
                          " in a fetched list: %s" %
-                         ', '.join(str(a) for a in missing_alarms))
+                         ', '.join(str(a) for a in sorted(missing_alarms)))
 
     @decorators.idempotent_id('f9966992-405d-475c-aa41-47213cecdf94')
     def test_alarm_create_set_log_test_actions(self):
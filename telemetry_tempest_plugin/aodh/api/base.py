@@ -16,6 +16,7 @@ from tempest.lib import exceptions as lib_exc
 import tempest.test
 
 from telemetry_tempest_plugin.aodh.service import client
+from telemetry_tempest_plugin import exceptions
 
 CONF = config.CONF
 
@@ -50,17 +51,30 @@ class BaseAlarmingTest(tempest.test.BaseTestCase):
         cls.alarm_ids.append(body['alarm_id'])
         return body
 
-    @staticmethod
-    def cleanup_resources(method, list_of_ids):
-        for resource_id in list_of_ids:
-            try:
-                method(resource_id)
-            except lib_exc.NotFound:
-                pass
+    @classmethod
+    def create_alarms_bulk(cls, n, type='event', **kwargs):
+        try:
+            bodies = cls.alarming_client.create_alarms_bulk(
+                n, type=type, **kwargs)
+        except exceptions.BulkOperationError as e:
+            cls.alarm_ids.extend(body['alarm_id'] for body in e.results
+                                 if body is not None)
+            raise
+        cls.alarm_ids.extend(body['alarm_id'] for body in bodies)
+        return bodies
+
+    @classmethod
+    def delete_alarms_bulk(cls, alarm_ids):
+        try:
+            cls.alarming_client.delete_alarms_bulk(alarm_ids)
+        except exceptions.BulkOperationError as e:
+            if not all(isinstance(error, lib_exc.NotFound)
+                       for error in e.errors):
+                raise
 
     @classmethod
     def resource_cleanup(cls):
-        cls.cleanup_resources(cls.alarming_client.delete_alarm, cls.alarm_ids)
+        cls.delete_alarms_bulk(cls.alarm_ids)
         super(BaseAlarmingTest, cls).resource_cleanup()
 
 
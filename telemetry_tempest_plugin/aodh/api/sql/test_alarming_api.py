@@ -52,59 +52,59 @@ class TelemetryAlarmingAPIMysqlTest(base.BaseAlarmingTest):
 
     @decorators.idempotent_id('2fa9ba1e-6118-4ce7-984c-b5d2c275de55')
     def test_create_list_sort_limit_delete_alarm(self):
-        # create test alarms
-        alarms = {}
+        # create test alarms of both severities, all with a name no other
+        # alarm has, so that only they are listed
+        alarm_name = data_utils.rand_name('sorted_alarms')
+        query = [['name', 'eq', alarm_name], ['type', 'eq', 'event']]
         sevs = ['critical', 'moderate']
-        for i in range(3):
-            alarm_name = data_utils.rand_name('sorted_alarms')
-            alarms[alarm_name] = []
-            for j in range(random.randint(2, 4)):
-                body = self.alarming_client.create_alarm(
-                    name=alarm_name,
-                    type='event',
-                    severity=sevs[j % 2],
-                    event_rule=self.rule)
-                alarms[alarm_name].append(body['alarm_id'])
-        ordered_alarms = []
-        for key in sorted(alarms):
-            ordered_alarms.extend([(key, a) for a in sorted(alarms[key])])
+        alarms = {}
+        for sev in sevs:
+            bodies = self.alarming_client.create_alarms_bulk(
+                random.randint(2, 4), name=alarm_name, type='event',
+                severity=sev, event_rule=self.rule)
+            alarms[sev] = sorted(body['alarm_id'] for body in bodies)
 
-        # Sort by severity and verify
+        # Sort by severity and verify the alarms are grouped by severity.
+        # The order of the severities depends on the database, so it is
+        # taken from the response.
         sort = ['severity:asc']
-        body = self.alarming_client.list_alarms(sort=sort)
-        self.assertEqual(set(sevs),
-                         set([alarm['severity'] for alarm in body if alarm[
-                             'name'].startswith('tempest-sorted_alarms')]))
+        body = self.alarming_client.list_alarms(query, sort=sort)
+        severities = [alarm['severity'] for alarm in body]
+        order = list(dict.fromkeys(severities))
+        self.assertEqual(sorted(sevs), sorted(order))
+        self.assertEqual(sorted(severities, key=order.index), severities)
         sort = ['severity']
-        body = self.alarming_client.list_alarms(sort=sort)
-        self.assertEqual(set(sevs),
-                         set([alarm['severity'] for alarm in body if alarm[
-                             'name'].startswith('tempest-sorted_alarms')]))
+        body = self.alarming_client.list_alarms(query, sort=sort)
+        self.assertEqual(severities, [alarm['severity'] for alarm in body])
+        sort = ['severity:desc']
+        body = self.alarming_client.list_alarms(query, sort=sort)
+        self.assertEqual(severities[::-1],
+                         [alarm['severity'] for alarm in body])
 
         # multiple sorts
-        sort = ['name:asc', 'alarm_id:asc']
-        body = self.alarming_client.list_alarms(sort=sort)
-        name_ids = [(a['name'], a['alarm_id']) for a in body if a[
-            'name'].startswith('tempest-sorted_alarms')]
-        self.assertEqual(ordered_alarms, name_ids)
+        ordered_alarms = [(sev, alarm_id) for sev in order
+                          for alarm_id in alarms[sev]]
+        sort = ['severity:asc', 'alarm_id:asc']
+        body = self.alarming_client.list_alarms(query, sort=sort)
+        sev_ids = [(a['severity'], a['alarm_id']) for a in body]
+        self.assertEqual(ordered_alarms, sev_ids)
 
         # limit and sort
-        sort = ['name:asc', 'alarm_id:asc']
         limit = 2
-        body = self.alarming_client.list_alarms(limit=limit)
-        self.assertEqual(2, len(body))
-        body = self.alarming_client.list_alarms(sort=sort, limit=limit)
+        body = self.alarming_client.list_alarms(query, limit=limit)
         self.assertEqual(2, len(body))
-        self.assertEqual([ordered_alarms[0][0], ordered_alarms[1][0]],
-                         [body[0]['name'], body[1]['name']])
+        body = self.alarming_client.list_alarms(query, sort=sort,
+                                                limit=limit)
+        self.assertEqual(ordered_alarms[:2],
+                         [(a['severity'], a['alarm_id']) for a in body])
         body = self.alarming_client.list_alarms(
-            sort=sort, marker=ordered_alarms[1][1])
-        name_ids = [(a['name'], a['alarm_id']) for a in body if a[
-            'name'].startswith('tempest-sorted_alarms')]
-        self.assertEqual(ordered_alarms[2:], name_ids)
+            query, sort=sort, marker=ordered_alarms[1][1])
+        sev_ids = [(a['severity'], a['alarm_id']) for a in body]
+        self.assertEqual(ordered_alarms[2:], sev_ids)
 
         # Delete alarms and verify if deleted
-        for name, alarm_id in ordered_alarms:
-            self.alarming_client.delete_alarm(alarm_id)
+        self.alarming_client.delete_alarms_bulk(
+            [alarm_id for sev, alarm_id in ordered_alarms])
+        for sev, alarm_id in ordered_alarms:
             self.assertRaises(lib_exc.NotFound,
                               self.alarming_client.show_alarm, alarm_id)
@@ -36,21 +36,22 @@ class TelemetryAlarmingAPITest(base.BaseAlarmingTest):
                      "op": "eq",
                      "value": "test"}]
             }
-            for i in range(2):
-                cls.create_alarm(event_rule=cls.rule)
+            cls.create_alarms_bulk(2, event_rule=cls.rule)
 
     @decorators.idempotent_id('1c918e06-210b-41eb-bd45-14676dd77cd7')
     def test_alarm_list(self):
-        # List alarms
-        alarm_list = self.alarming_client.list_alarms()
+        # List alarms until all the created ones are found
+        missing_alarms = set(self.alarm_ids)
+        for alarm in self.alarming_client.iter_alarms():
+            missing_alarms.discard(alarm['alarm_id'])
+            if not missing_alarms:
+                break
 
         # Verify created alarm in the list
-        fetched_ids = [a['alarm_id'] for a in alarm_list]
-        missing_alarms = [a for a in self.alarm_ids if a not in fetched_ids]
         self.assertEqual(0, len(missing_alarms),
                          "Failed to find the following created alarm(s)"
                          " in a fetched list: %s" %
-                         ', '.join(str(a) for a in missing_alarms))
+                         ', '.join(str(a) for a in sorted(missing_alarms)))
 
     @decorators.idempotent_id('1297b095-39c1-4e74-8a1f-4ae998cedd68')
     def test_create_update_get_delete_alarm(self):
@@ -231,8 +232,8 @@ class TelemetryAlarmingAPITest(base.BaseAlarmingTest):
         self.assertEqual(alarm_name, body2['name'])
         self.assertNotEqual(alarm1_id, alarm2_id)
 
-        # Query by name and verify
-        query = ['name', 'eq', alarm_name]
+        # Query by name and type and verify
+        query = [['name', 'eq', alarm_name], ['type', 'eq', 'event']]
         body = self.alarming_client.list_alarms(query)
         self.assertEqual(2, len(body))
         self.assertEqual(set([alarm_name]),
@@ -321,37 +322,34 @@ class TelemetryAlarmingAPITest(base.BaseAlarmingTest):
 
     @decorators.idempotent_id('e1d65c3c-a64d-4968-949c-96f2b2d8b363')
     def test_create_list_sort_limit_delete_alarm(self):
-        # create test alarms
+        # create test alarms, with a severity no other alarm of this class
+        # has, so that only they are listed
+        query = ['severity', 'eq', 'critical']
         alarms = {}
         for i in range(3):
             alarm_name = data_utils.rand_name('sorted_alarms')
-            alarms[alarm_name] = []
-            for j in range(random.randint(2, 4)):
-                body = self.alarming_client.create_alarm(
-                    name=alarm_name, type='event',
-                    event_rule=self.rule)
-                alarms[alarm_name].append(body['alarm_id'])
+            bodies = self.alarming_client.create_alarms_bulk(
+                random.randint(2, 4), name=alarm_name, type='event',
+                severity='critical', event_rule=self.rule)
+            alarms[alarm_name] = [body['alarm_id'] for body in bodies]
         ordered_alarms = []
         for key in sorted(alarms):
             ordered_alarms.extend([(key, a) for a in sorted(alarms[key])])
 
         # Sort by name and verify
         sort = ['name:asc']
-        body = self.alarming_client.list_alarms(sort=sort)
+        body = self.alarming_client.list_alarms(query, sort=sort)
         self.assertEqual([alarm[0] for alarm in ordered_alarms],
-                         [alarm['name'] for alarm in body if alarm[
-                             'name'].startswith('tempest-sorted_alarms')])
+                         [alarm['name'] for alarm in body])
         sort = ['name']
-        body = self.alarming_client.list_alarms(sort=sort)
+        body = self.alarming_client.list_alarms(query, sort=sort)
         self.assertEqual([alarm[0] for alarm in ordered_alarms],
-                         [alarm['name'] for alarm in body if alarm[
-                             'name'].startswith('tempest-sorted_alarms')])
+                         [alarm['name'] for alarm in body])
 
         # multiple sorts
         sort = ['name:asc', 'alarm_id:asc']
-        body = self.alarming_client.list_alarms(sort=sort)
-        name_ids = [(a['name'], a['alarm_id']) for a in body if a[
-            'name'].startswith('tempest-sorted_alarms')]
+        body = self.alarming_client.list_alarms(query, sort=sort)
+        name_ids = [(a['name'], a['alarm_id']) for a in body]
         self.assertEqual(ordered_alarms, name_ids)
 
         # limit and sort
@@ -359,18 +357,19 @@ class TelemetryAlarmingAPITest(base.BaseAlarmingTest):
         limit = 2
         body = self.alarming_client.list_alarms(limit=limit)
         self.assertEqual(2, len(body))
-        body = self.alarming_client.list_alarms(sort=sort, limit=limit)
+        body = self.alarming_client.list_alarms(query, sort=sort,
+                                                limit=limit)
         self.assertEqual(2, len(body))
         self.assertEqual([ordered_alarms[0][0], ordered_alarms[1][0]],
                          [body[0]['name'], body[1]['name']])
         body = self.alarming_client.list_alarms(
-            sort=sort, marker=ordered_alarms[1][1])
-        name_ids = [(a['name'], a['alarm_id']) for a in body if a[
-            'name'].startswith('tempest-sorted_alarms')]
+            query, sort=sort, marker=ordered_alarms[1][1])
+        name_ids = [(a['name'], a['alarm_id']) for a in body]
         self.assertEqual(ordered_alarms[2:], name_ids)
 
         # Delete alarms and verify if deleted
+        self.alarming_client.delete_alarms_bulk(
+            [alarm_id for name, alarm_id in ordered_alarms])
         for name, alarm_id in ordered_alarms:
-            self.alarming_client.delete_alarm(alarm_id)
             self.assertRaises(lib_exc.NotFound,
                               self.alarming_client.show_alarm, alarm_id)
@@ -13,37 +13,64 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import json
-
+from concurrent import futures
 from urllib import parse
 
 from tempest import clients as tempest_clients
 from tempest import config
 from tempest.lib.common import rest_client
+from tempest.lib.common.utils import data_utils
 from tempest.lib.services import clients
 
+from telemetry_tempest_plugin.common import http
+from telemetry_tempest_plugin.common import jsonutils
+from telemetry_tempest_plugin.common import metrics
+from telemetry_tempest_plugin import exceptions
+from telemetry_tempest_plugin.gnocchi.service import client as gnocchi
 
 CONF = config.CONF
 
 
-class AlarmingClient(rest_client.RestClient):
+class AlarmingClient(metrics.RequestMetricsMixin, rest_client.RestClient):
 
     version = '2'
     uri_prefix = "v2"
 
+    def __init__(self, auth_provider, service, region, keepalive=False,
+                 pool_size=10, bulk_concurrency=10, metrics=None, **kwargs):
+        super(AlarmingClient, self).__init__(auth_provider, service, region,
+                                             **kwargs)
+        self.bulk_concurrency = bulk_concurrency
+        self.metrics = metrics
+        if keepalive:
+            self.http_obj = http.keepalive_http(
+                proxy_url=kwargs.get('proxy_url'),
+                disable_ssl_certificate_validation=self.dscv,
+                ca_certs=kwargs.get('ca_certs'),
+                timeout=kwargs.get('http_timeout'),
+                follow_redirects=kwargs.get('follow_redirects', True),
+                maxsize=pool_size)
+
     def deserialize(self, body):
-        return json.loads(body.decode('utf-8').replace("\n", ""))
+        return jsonutils.loads(body)
 
     def serialize(self, body):
-        return json.dumps(body)
+        return jsonutils.dumps(body)
 
     def list_alarms(self, query=None, sort=None, limit=None, marker=None):
+        """List alarms
+
+        :param query: a [field, op, value] clause, or a list of such clauses
+                      which alarms must all match.
+        """
         uri = '%s/alarms' % self.uri_prefix
         uri_dict = {}
         if query:
-            uri_dict = {'q.field': query[0],
-                        'q.op': query[1],
-                        'q.value': query[2]}
+            if isinstance(query[0], str):
+                query = [query]
+            uri_dict = {'q.field': [clause[0] for clause in query],
+                        'q.op': [clause[1] for clause in query],
+                        'q.value': [clause[2] for clause in query]}
         if sort:
             uri_dict.update({'sort': sort})
         if limit is not None:
@@ -57,6 +84,21 @@ class AlarmingClient(rest_client.RestClient):
         body = self.deserialize(body)
         return rest_client.ResponseBodyList(resp, body)
 
+    def iter_alarms(self, query=None, sort=None, page_size=100):
+        """Iterate over alarms, fetching them page_size at a time.
+
+        Each page is only requested once the iteration reaches it, using
+        the limit and marker parameters of list_alarms.
+        """
+        marker = None
+        while True:
+            page = self.list_alarms(query, sort, limit=page_size,
+                                    marker=marker)
+            yield from page
+            if len(page) < page_size:
+                return
+            marker = page[-1]['alarm_id']
+
     def show_alarm(self, alarm_id):
         uri = '%s/alarms/%s' % (self.uri_prefix, alarm_id)
         resp, body = self.get(uri)
@@ -87,6 +129,50 @@ class AlarmingClient(rest_client.RestClient):
         body = self.deserialize(body)
         return rest_client.ResponseBody(resp, body)
 
+    def _run_bulk(self, method, calls):
+        with futures.ThreadPoolExecutor(
+                max_workers=self.bulk_concurrency) as executor:
+            fs = [executor.submit(method, *args, **kwargs)
+                  for args, kwargs in calls]
+        results = []
+        errors = []
+        for f in fs:
+            try:
+                results.append(f.result())
+            except Exception as e:
+                results.append(None)
+                errors.append(e)
+        if errors:
+            raise exceptions.BulkOperationError(results, errors)
+        return results
+
+    def create_alarms_bulk(self, n, **kwargs):
+        """Create n alarms, up to bulk_concurrency at a time.
+
+        The alarms get the same attributes, except their name, which is a
+        random one for each alarm unless a name is given.
+
+        :return: the bodies of the created alarms
+        :raises BulkOperationError: once all requests are done, if some of
+            them failed. Its results attribute holds the alarms which were
+            created, and None in place of those which were not.
+        """
+        if 'name' in kwargs:
+            calls = [((), kwargs)] * n
+        else:
+            calls = [((), dict(kwargs, name=data_utils.rand_name(
+                'telemetry_alarm'))) for i in range(n)]
+        return self._run_bulk(self.create_alarm, calls)
+
+    def delete_alarms_bulk(self, alarm_ids):
+        """Delete alarms, up to bulk_concurrency at a time.
+
+        :raises BulkOperationError: once all requests are done, if some of
+            them failed.
+        """
+        return self._run_bulk(self.delete_alarm,
+                              [((alarm_id,), {}) for alarm_id in alarm_ids])
+
     def update_alarm(self, alarm_id, **kwargs):
         uri = "%s/alarms/%s" % (self.uri_prefix, alarm_id)
         body = self.serialize(kwargs)
@@ -146,9 +232,21 @@ class Manager(clients.ServiceClients):
         'service': CONF.alarming_plugin.catalog_type,
         'region': CONF.identity.region,
         'endpoint_type': CONF.alarming_plugin.endpoint_type,
+        'keepalive': CONF.alarming_plugin.http_keepalive,
+        'pool_size': CONF.alarming_plugin.http_pool_size,
+        'bulk_concurrency': CONF.alarming_plugin.bulk_concurrency,
     }
     alarming_params.update(default_params)
 
+    gnocchi_params = {
+        'service': CONF.metric.catalog_type,
+        'region': CONF.identity.region,
+        'endpoint_type': CONF.metric.endpoint_type,
+        'keepalive': CONF.metric.http_keepalive,
+        'pool_size': CONF.metric.http_pool_size,
+    }
+    gnocchi_params.update(default_params)
+
     def __init__(self, credentials=None, service=None):
         dscv = CONF.identity.disable_ssl_certificate_validation
         _, uri = tempest_clients.get_auth_provider_class(credentials)
@@ -160,7 +258,14 @@ class Manager(clients.ServiceClients):
             ca_certs=CONF.identity.ca_certificates_file,
             trace_requests=CONF.debug.trace_requests)
         self.set_alarming_client()
+        self.set_gnocchi_client()
 
     def set_alarming_client(self):
-        self.alarming_client = AlarmingClient(self.auth_provider,
-                                              **self.alarming_params)
+        self.alarming_client = AlarmingClient(
+            self.auth_provider, metrics=metrics.get_registry(),
+            **self.alarming_params)
+
+    def set_gnocchi_client(self):
+        self.gnocchi_client = gnocchi.GnocchiClient(
+            self.auth_provider, metrics=metrics.get_registry(),
+            **self.gnocchi_params)
@@ -0,0 +1,746 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""An in-memory stand-in for the Aodh v2 API.
+
+It implements the alarms API the alarming tests and benchmarks use: alarm
+creation, update, deletion, listing with queries, sorting and pagination,
+state and history, plus the capabilities and versions documents. It does
+not evaluate alarms.
+
+Alarms are indexed by project and by the fields queries can filter on, and
+kept in creation order, so listing the alarms of a project page by page
+stays fast with hundreds of thousands of alarms.
+
+Without keystonemiddleware in front of it, each token is its own project,
+and the tokens given as admin tokens are admin. It can be served over HTTP::
+
+    python -m telemetry_tempest_plugin.aodh.simulator --port 8042
+
+or used in-process as a WSGI app, for instance as the gabbi intercept of the
+alarming service, by setting [telemetry] gabbi_intercepts to
+alarming_plugin:telemetry_tempest_plugin.aodh.simulator.make_app.
+"""
+
+import argparse
+import bisect
+import collections
+import io
+import re
+import sys
+import threading
+import uuid
+import zoneinfo
+
+from http import server as http_server
+from urllib import parse
+
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
+from telemetry_tempest_plugin.common import jsonutils
+
+ALARM_TYPES = (
+    'event',
+    'composite',
+    'threshold',
+    'gnocchi_resources_threshold',
+    'gnocchi_aggregation_by_metrics_threshold',
+    'gnocchi_aggregation_by_resources_threshold',
+    'loadbalancer_member_health',
+    'prometheus',
+)
+STATES = ('ok', 'alarm', 'insufficient data')
+SEVERITIES = ('low', 'moderate', 'critical')
+INDEXED_FIELDS = ('project_id', 'user_id', 'name', 'type', 'state',
+                  'severity', 'enabled')
+QUERY_FIELDS = INDEXED_FIELDS + ('alarm_id',)
+SORT_KEYS = ('alarm_id', 'enabled', 'name', 'type', 'severity', 'timestamp',
+             'user_id', 'project_id', 'state', 'repeat_actions',
+             'state_timestamp')
+ACTION_FIELDS = ('ok_actions', 'alarm_actions', 'insufficient_data_actions')
+ACTION_SCHEMES = ('http', 'https', 'log', 'test', 'trust+http', 'trust+https',
+                  'zaqar', 'trust+zaqar', 'heat', 'trust+heat')
+COMPARISON_OPERATORS = ('lt', 'le', 'eq', 'ne', 'ge', 'gt')
+AGGREGATION_METHODS = ('mean', 'sum', 'last', 'max', 'min', 'std', 'median',
+                       'first', 'count')
+# Fields whose change is not recorded in the history of an alarm
+UNTRACKED_FIELDS = ('timestamp', 'state_timestamp', 'state_reason')
+
+CRON_RE = re.compile(r'^\S+( \S+){4,5}$')
+
+LOG = logging.getLogger(__name__)
+
+
+class APIError(Exception):
+    """An error answered to the client with the given HTTP status."""
+
+    def __init__(self, status, message):
+        super(APIError, self).__init__(message)
+        self.status = status
+        self.message = message
+
+
+class BadRequest(APIError):
+    def __init__(self, message):
+        super(BadRequest, self).__init__('400 Bad Request', message)
+
+
+class NotFound(APIError):
+    def __init__(self, alarm_id):
+        super(NotFound, self).__init__('404 Not Found',
+                                       'Alarm %s not found' % alarm_id)
+
+
+def _now():
+    return timeutils.utcnow().isoformat()
+
+
+def _normalize_actions(actions):
+    # Aodh parses action URLs, which normalizes them, and drops duplicates
+    normalized = []
+    for action in actions or []:
+        parts = parse.urlsplit(action)
+        if parts.scheme not in ACTION_SCHEMES:
+            raise BadRequest('Unsupported action %s' % action)
+        action = parse.urlunsplit(parts)
+        if action not in normalized:
+            normalized.append(action)
+    return normalized
+
+
+def _positive_int(rule, key, default):
+    try:
+        value = int(rule.get(key, default))
+    except (TypeError, ValueError):
+        value = 0
+    if value <= 0:
+        raise BadRequest("Invalid input for field/attribute %s. Value: "
+                         "'%s'. Value must be positive" %
+                         (key, rule.get(key)))
+    return value
+
+
+def _validate_time_constraints(constraints):
+    if not isinstance(constraints, list):
+        raise BadRequest('time_constraints must be a list')
+    names = set()
+    for constraint in constraints:
+        if not isinstance(constraint, dict):
+            raise BadRequest("Invalid input for field/attribute "
+                             "time_constraints. Value: '%s'. A time "
+                             "constraint must be a JSON object" % constraint)
+        name = constraint.get('name')
+        if name in names:
+            raise BadRequest('Time constraint names must be unique for a '
+                             'given alarm.')
+        names.add(name)
+        if not CRON_RE.match(str(constraint.get('start', ''))):
+            raise BadRequest("Invalid input for field/attribute start. "
+                             "Value: '%s'. Cron expression is not valid" %
+                             constraint.get('start'))
+        _positive_int(constraint, 'duration', None)
+        timezone = constraint.get('timezone')
+        if timezone:
+            try:
+                zoneinfo.ZoneInfo(timezone)
+            except (ValueError, zoneinfo.ZoneInfoNotFoundError):
+                raise BadRequest("Invalid input for field/attribute "
+                                 "timezone. Value: '%s'. Timezone %s is not "
+                                 "valid" % (timezone, timezone))
+    return constraints
+
+
+def _validate_threshold_rule(rule):
+    """Check a threshold rule and fill in its defaults, like Aodh does."""
+    rule = dict(rule)
+    if 'threshold' not in rule:
+        raise BadRequest('Mandatory field threshold is missing')
+    try:
+        rule['threshold'] = float(rule['threshold'])
+    except (TypeError, ValueError):
+        raise BadRequest("Invalid input for field/attribute threshold. "
+                         "Value: '%s'" % rule['threshold'])
+    rule.setdefault('comparison_operator', 'eq')
+    if rule['comparison_operator'] not in COMPARISON_OPERATORS:
+        raise BadRequest("Invalid input for field/attribute "
+                         "comparison_operator. Value: '%s'. Value should be "
+                         "one of: %s" % (rule['comparison_operator'],
+                                         ', '.join(COMPARISON_OPERATORS)))
+    rule['evaluation_periods'] = _positive_int(rule, 'evaluation_periods', 1)
+    rule['granularity'] = _positive_int(rule, 'granularity', 60)
+    return rule
+
+
+def _validate_gnocchi_rule(alarm_type, rule):
+    rule = _validate_threshold_rule(rule)
+    method = rule.get('aggregation_method') or ''
+    if method.startswith('rate:'):
+        method = method[len('rate:'):]
+    if method not in AGGREGATION_METHODS and not re.match(r'^\d+pct$',
+                                                          method):
+        raise BadRequest("aggregation_method should be in %s not %s" %
+                         (', '.join(AGGREGATION_METHODS),
+                          rule.get('aggregation_method')))
+    required = {
+        'gnocchi_resources_threshold': ('metric', 'resource_id',
+                                        'resource_type'),
+        'gnocchi_aggregation_by_metrics_threshold': ('metrics',),
+        'gnocchi_aggregation_by_resources_threshold': ('metric', 'query',
+                                                       'resource_type'),
+    }[alarm_type]
+    for key in required:
+        if not rule.get(key):
+            raise BadRequest('Mandatory field %s is missing' % key)
+    return rule
+
+
+def _sort_value(value):
+    # None sorts first, whatever the type of the other values
+    return (value is not None, value)
+
+
+class AlarmStore(object):
+    """Alarms and their history, indexed for listing.
+
+    Each alarm gets a sequence number when it is created. Indexes map the
+    values of each indexed field to the sorted list of the sequence numbers
+    of the alarms having it, which is their creation order. Sorted listings
+    are kept until the next change of the store, so walking through them
+    page by page only sorts the alarms once.
+    """
+
+    # Number of sorted listings kept
+    SORT_CACHE_SIZE = 16
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sorted = collections.OrderedDict()
+        self._seq = 0
+        self._alarms = {}
+        self._ids = {}
+        self._all = []
+        self._indexes = dict((field, {}) for field in INDEXED_FIELDS)
+        self._history = {}
+
+    def _index(self, seq, alarm):
+        self._sorted.clear()
+        for field in INDEXED_FIELDS:
+            seqs = self._indexes[field].setdefault(alarm[field], [])
+            bisect.insort(seqs, seq)
+
+    def _unindex(self, seq, alarm):
+        self._sorted.clear()
+        for field in INDEXED_FIELDS:
+            seqs = self._indexes[field][alarm[field]]
+            del seqs[bisect.bisect_left(seqs, seq)]
+            if not seqs:
+                del self._indexes[field][alarm[field]]
+
+    def _record(self, alarm, change_type, detail, user_id, project_id):
+        self._history[alarm['alarm_id']].append({
+            'event_id': str(uuid.uuid4()),
+            'alarm_id': alarm['alarm_id'],
+            'type': change_type,
+            'detail': jsonutils.dumps(detail).decode('utf-8'),
+            'user_id': user_id,
+            'project_id': project_id,
+            'on_behalf_of': alarm['project_id'],
+            'timestamp': _now(),
+        })
+
+    def _get(self, alarm_id, project_id, admin):
+        seq = self._ids.get(alarm_id)
+        if seq is None:
+            raise NotFound(alarm_id)
+        alarm = self._alarms[seq]
+        if not admin and alarm['project_id'] != project_id:
+            raise NotFound(alarm_id)
+        return seq, alarm
+
+    def get(self, alarm_id, project_id, admin):
+        with self._lock:
+            return self._get(alarm_id, project_id, admin)[1]
+
+    def create(self, alarm, user_id, project_id):
+        with self._lock:
+            self._seq += 1
+            self._alarms[self._seq] = alarm
+            self._ids[alarm['alarm_id']] = self._seq
+            self._all.append(self._seq)
+            self._index(self._seq, alarm)
+            self._history[alarm['alarm_id']] = []
+            self._record(alarm, 'creation', alarm, user_id, project_id)
+        return alarm
+
+    def update(self, alarm_id, project_id, admin, update, user_id):
+        """Replace an alarm by the result of update(alarm)."""
+        with self._lock:
+            seq, old = self._get(alarm_id, project_id, admin)
+            alarm = update(old)
+            self._unindex(seq, old)
+            self._alarms[seq] = alarm
+            self._index(seq, alarm)
+            change = dict((k, v) for k, v in alarm.items()
+                          if v != old.get(k) and k not in UNTRACKED_FIELDS)
+            if 'state' in change:
+                self._record(alarm, 'state transition',
+                             {'state': alarm['state'],
+                              'transition_reason': alarm['state_reason']},
+                             user_id, project_id)
+                del change['state']
+            if change:
+                self._record(alarm, 'rule change', change, user_id,
+                             project_id)
+        return alarm
+
+    def delete(self, alarm_id, project_id, admin, user_id):
+        with self._lock:
+            seq, alarm = self._get(alarm_id, project_id, admin)
+            self._unindex(seq, alarm)
+            del self._alarms[seq]
+            del self._ids[alarm_id]
+            del self._all[bisect.bisect_left(self._all, seq)]
+            del self._history[alarm_id]
+
+    def history(self, alarm_id, project_id, admin):
+        with self._lock:
+            self._get(alarm_id, project_id, admin)
+            return list(reversed(self._history[alarm_id]))
+
+    def list(self, filters, sorts, limit, marker):
+        """List the alarms matching all the filters.
+
+        :param filters: a dict mapping fields to the value alarms must have.
+        :param sorts: a list of (key, direction) pairs. Alarms are listed
+                      from the newest to the oldest if empty.
+        :param marker: the id of the alarm the listing starts after.
+        """
+        with self._lock:
+            if 'alarm_id' in filters:
+                seq = self._ids.get(filters['alarm_id'])
+                candidates = [seq] if seq is not None else []
+            else:
+                # Walk the shortest index matching one of the filters
+                candidates = min(
+                    (self._indexes[field].get(value, [])
+                     for field, value in filters.items()),
+                    key=len, default=self._all)
+            marker_seq = None
+            if marker is not None:
+                marker_seq = self._ids.get(marker)
+                if marker_seq is None:
+                    raise BadRequest('Invalid marker %s' % marker)
+
+            def matches(alarm):
+                return all(alarm[field] == value
+                           for field, value in filters.items())
+
+            if not sorts:
+                end = len(candidates)
+                if marker_seq is not None:
+                    end = bisect.bisect_left(candidates, marker_seq)
+                alarms = []
+                for i in range(end - 1, -1, -1):
+                    alarm = self._alarms[candidates[i]]
+                    if matches(alarm):
+                        alarms.append(alarm)
+                        if limit is not None and len(alarms) >= limit:
+                            break
+                return alarms
+
+            cache_key = (tuple(sorted(filters.items())), tuple(sorts))
+            cached = self._sorted.get(cache_key)
+            if cached is None:
+                seqs = [seq for seq in reversed(candidates)
+                        if matches(self._alarms[seq])]
+                for key, direction in reversed(sorts):
+                    seqs.sort(key=lambda seq: _sort_value(
+                        self._alarms[seq].get(key)),
+                        reverse=direction == 'desc')
+                positions = dict((seq, i) for i, seq in enumerate(seqs))
+                cached = self._sorted[cache_key] = (seqs, positions)
+                if len(self._sorted) > self.SORT_CACHE_SIZE:
+                    self._sorted.popitem(last=False)
+            else:
+                self._sorted.move_to_end(cache_key)
+            seqs, positions = cached
+            start = 0
+            if marker_seq is not None:
+                if marker_seq not in positions:
+                    raise BadRequest('Invalid marker %s' % marker)
+                start = positions[marker_seq] + 1
+            end = len(seqs) if limit is None else start + limit
+            return [self._alarms[seq] for seq in seqs[start:end]]
+
+
+class AodhSimulator(object):
+    """A WSGI app answering like the Aodh v2 API."""
+
+    def __init__(self, store=None, admin_tokens=()):
+        self.store = store if store is not None else AlarmStore()
+        self.admin_tokens = frozenset(admin_tokens)
+
+    def _credentials(self, environ):
+        # Headers set by keystonemiddleware, if it is in front of us
+        project_id = environ.get('HTTP_X_PROJECT_ID')
+        if project_id:
+            roles = environ.get('HTTP_X_ROLES', '').split(',')
+            return (environ.get('HTTP_X_USER_ID', ''), project_id,
+                    'admin' in roles)
+        token = environ.get('HTTP_X_AUTH_TOKEN')
+        if not token:
+            raise APIError('401 Unauthorized',
+                           'The request you have made requires '
+                           'authentication.')
+        return (uuid.uuid5(uuid.NAMESPACE_URL, 'user:' + token).hex,
+                uuid.uuid5(uuid.NAMESPACE_URL, 'project:' + token).hex,
+                token in self.admin_tokens)
+
+    @staticmethod
+    def _read_body(environ):
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        try:
+            return jsonutils.loads(environ['wsgi.input'].read(length))
+        except ValueError as e:
+            raise BadRequest('Invalid JSON body: %s' % e)
+
+    def _build_alarm(self, data, user_id, project_id, admin, old=None):
+        if not isinstance(data, dict):
+            raise BadRequest('An alarm must be a JSON object')
+        alarm_type = data.get('type')
+        if alarm_type not in ALARM_TYPES:
+            raise BadRequest("Invalid input for field/attribute type. "
+                             "Value: '%s'. Value should be one of: %s" %
+                             (alarm_type, ', '.join(ALARM_TYPES)))
+        rule_key = '%s_rule' % alarm_type
+        if alarm_type != 'event' and not isinstance(data.get(rule_key),
+                                                    dict):
+            raise BadRequest('%s must be set for %s type alarm' %
+                             (rule_key, alarm_type))
+        if not data.get('name'):
+            raise BadRequest('Mandatory field name is missing')
+        severity = data.get('severity', 'low')
+        if severity not in SEVERITIES:
+            raise BadRequest("Invalid input for field/attribute severity. "
+                             "Value: '%s'" % severity)
+        state = data.get('state', 'insufficient data')
+        if state not in STATES:
+            raise BadRequest("Invalid input for field/attribute state. "
+                             "Value: '%s'" % state)
+        for field in ('enabled', 'repeat_actions'):
+            if not isinstance(data.get(field, False), (bool, int)):
+                raise BadRequest("Invalid input for field/attribute %s. "
+                                 "Value: '%s'. Wrong type. Expected "
+                                 "'<class 'bool'>'" % (field, data[field]))
+        time_constraints = _validate_time_constraints(
+            data.get('time_constraints', []))
+        rule = data.get(rule_key) or {}
+        if alarm_type.startswith('gnocchi_'):
+            rule = _validate_gnocchi_rule(alarm_type, rule)
+        elif alarm_type == 'threshold':
+            rule = _validate_threshold_rule(rule)
+
+        now = _now()
+        if old is None:
+            alarm = {
+                'alarm_id': str(uuid.uuid4()),
+                'user_id': user_id,
+                'project_id': project_id,
+                'timestamp': now,
+                'state': state,
+                'state_reason': 'Not evaluated yet',
+                'state_timestamp': now,
+            }
+            if admin:
+                alarm['user_id'] = data.get('user_id') or user_id
+                alarm['project_id'] = data.get('project_id') or project_id
+        else:
+            alarm = dict((key, old[key]) for key in (
+                'alarm_id', 'user_id', 'project_id', 'state', 'state_reason',
+                'state_timestamp'))
+            alarm['timestamp'] = now
+            if 'state' in data and state != old['state']:
+                alarm['state'] = state
+                alarm['state_reason'] = 'Manually set via API'
+                alarm['state_timestamp'] = now
+        alarm.update({
+            'name': data['name'],
+            'type': alarm_type,
+            rule_key: rule,
+            'description': (data.get('description')
+                            or '%s alarm rule' % alarm_type),
+            'enabled': bool(data.get('enabled', True)),
+            'repeat_actions': bool(data.get('repeat_actions', False)),
+            'severity': severity,
+            'time_constraints': time_constraints,
+        })
+        for field in ACTION_FIELDS:
+            alarm[field] = _normalize_actions(data.get(field))
+        return alarm
+
+    def _list_alarms(self, environ, user_id, project_id, admin):
+        params = parse.parse_qs(environ.get('QUERY_STRING', ''))
+        fields = params.get('q.field', [])
+        values = params.get('q.value', [])
+        ops = params.get('q.op', ['eq'] * len(fields))
+        if not len(fields) == len(values) == len(ops):
+            raise BadRequest('Incomplete query')
+        filters = {}
+        all_projects = False
+        for field, op, value in zip(fields, ops, values):
+            if field == 'all_projects':
+                if not admin:
+                    raise APIError('403 Forbidden',
+                                   'RBAC Authorization Failed')
+                all_projects = value.lower() == 'true'
+                continue
+            if field not in QUERY_FIELDS:
+                raise BadRequest('Unknown argument: "%s": unrecognized '
+                                 'field in query' % field)
+            if op != 'eq':
+                raise BadRequest('Operator %s is not supported. Only `eq` '
+                                 'operator is available for field %s' %
+                                 (op, field))
+            if (field == 'project_id' and value != project_id
+                    and not admin):
+                raise APIError('401 Unauthorized',
+                               'Not Authorized to access project %s' % value)
+            if field == 'enabled':
+                value = value.lower() in ('true', '1', 'yes')
+            filters[field] = value
+        if not all_projects:
+            filters.setdefault('project_id', project_id)
+
+        sorts = []
+        for sort in params.get('sort', []):
+            key, _, direction = sort.partition(':')
+            if key not in SORT_KEYS:
+                raise BadRequest('Invalid input for field/attribute sort. '
+                                 "Value: '%s'. the sort parameter should "
+                                 'be a pair of sort key and sort dir '
+                                 'combined with colon(:)' % sort)
+            direction = direction or 'asc'
+            if direction not in ('asc', 'desc'):
+                raise BadRequest('Invalid sort direction %s' % direction)
+            sorts.append((key, direction))
+
+        limit = None
+        if 'limit' in params:
+            try:
+                limit = int(params['limit'][0])
+            except ValueError:
+                limit = 0
+            if limit <= 0:
+                raise BadRequest('Limit must be positive')
+        marker = params.get('marker', [None])[0]
+        return self.store.list(filters, sorts, limit, marker)
+
+    @staticmethod
+    def _set_state(state):
+        def update(alarm):
+            return dict(alarm, state=state,
+                        state_reason='Manually set via API',
+                        state_timestamp=_now())
+        return update
+
+    def _route(self, method, path, environ):
+        user_id, project_id, admin = self._credentials(environ)
+        store = self.store
+        if path == ['v2', 'capabilities'] and method == 'GET':
+            return '200 OK', {
+                'api': {'alarms:query:simple': True,
+                        'alarms:query:complex': False,
+                        'alarms:history:query:simple': True,
+                        'alarms:history:query:complex': False},
+                'alarm_storage': {'storage:production_ready': False},
+            }
+        if path[:2] != ['v2', 'alarms'] or len(path) > 4:
+            raise APIError('404 Not Found', 'The resource could not be '
+                                            'found.')
+        if len(path) == 2:
+            if method == 'GET':
+                return '200 OK', self._list_alarms(environ, user_id,
+                                                   project_id, admin)
+            if method == 'POST':
+                alarm = self._build_alarm(self._read_body(environ), user_id,
+                                          project_id, admin)
+                return '201 Created', store.create(alarm, user_id,
+                                                   project_id)
+        elif len(path) == 3:
+            alarm_id = path[2]
+            if method == 'GET':
+                return '200 OK', store.get(alarm_id, project_id, admin)
+            if method == 'PUT':
+                data = self._read_body(environ)
+                return '200 OK', store.update(
+                    alarm_id, project_id, admin,
+                    lambda old: self._build_alarm(data, user_id, project_id,
+                                                  admin, old),
+                    user_id)
+            if method == 'DELETE':
+                store.delete(alarm_id, project_id, admin, user_id)
+                return '204 No Content', None
+        elif path[3] == 'state':
+            alarm_id = path[2]
+            if method == 'GET':
+                return '200 OK', store.get(alarm_id, project_id,
+                                           admin)['state']
+            if method == 'PUT':
+                state = self._read_body(environ)
+                if state not in STATES:
+                    raise BadRequest("Invalid input for field/attribute "
+                                     "state. Value: '%s'" % state)
+                return '200 OK', store.update(
+                    alarm_id, project_id, admin, self._set_state(state),
+                    user_id)['state']
+        elif path[3] == 'history':
+            if method == 'GET':
+                return '200 OK', store.history(path[2], project_id, admin)
+        else:
+            raise APIError('404 Not Found', 'The resource could not be '
+                                            'found.')
+        raise APIError('405 Method Not Allowed',
+                       'Method %s not allowed' % method)
+
+    def _versions(self, environ):
+        url = '%s://%s%s/' % (environ['wsgi.url_scheme'],
+                              environ.get('HTTP_HOST', 'localhost'),
+                              environ.get('SCRIPT_NAME', ''))
+        return {'versions': {'values': [{
+            'id': 'v2',
+            'status': 'stable',
+            'updated': '2013-02-13T00:00:00Z',
+            'links': [{'href': url + 'v2', 'rel': 'self'}],
+            'media-types': [
+                {'base': 'application/json',
+                 'type': 'application/vnd.openstack.telemetry-v2+json'},
+                {'base': 'application/xml',
+                 'type': 'application/vnd.openstack.telemetry-v2+xml'}],
+        }]}}
+
+    def __call__(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        path = [p for p in environ.get('PATH_INFO', '').split('/') if p]
+        try:
+            if not path and method == 'GET':
+                status, body = '200 OK', self._versions(environ)
+            else:
+                status, body = self._route(method, path, environ)
+        except APIError as e:
+            status, body = e.status, {'error_message': {
+                'faultstring': e.message,
+                'faultcode': 'Client',
+                'debuginfo': None}}
+        except Exception as e:
+            LOG.exception('Error while answering %s %s', method,
+                          environ.get('PATH_INFO', ''))
+            status, body = '500 Internal Server Error', {'error_message': {
+                'faultstring': str(e),
+                'faultcode': 'Server',
+                'debuginfo': None}}
+        if body is None:
+            start_response(status, [])
+            return []
+        body = jsonutils.dumps(body)
+        start_response(status, [('Content-Type', 'application/json'),
+                                ('Content-Length', str(len(body)))])
+        return [body]
+
+
+_STORE = AlarmStore()
+
+
+def make_app():
+    """Return a simulator sharing the alarms of all the apps of the process.
+
+    gabbi creates a new intercept app for each test, this lets the tests of
+    a suite see the alarms created by the previous ones.
+    """
+    return AodhSimulator(_STORE)
+
+
+class _RequestHandler(http_server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _handle(self):
+        path, _, query = self.path.partition('?')
+        length = int(self.headers.get('Content-Length') or 0)
+        environ = {
+            'REQUEST_METHOD': self.command,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': parse.unquote(path),
+            'QUERY_STRING': query,
+            'CONTENT_LENGTH': str(length),
+            'SERVER_NAME': self.server.server_address[0],
+            'SERVER_PORT': str(self.server.server_address[1]),
+            'wsgi.url_scheme': 'http',
+            # Read the whole body, so the next request of the connection
+            # starts at the right place whatever the app reads
+            'wsgi.input': io.BytesIO(self.rfile.read(length)),
+        }
+        for name, value in self.headers.items():
+            environ['HTTP_%s' % name.upper().replace('-', '_')] = value
+
+        response = []
+
+        def start_response(status, headers, exc_info=None):
+            response[:] = [status, headers]
+
+        body = b''.join(self.server.app(environ, start_response))
+        status, headers = response
+        head = ['%s %s\r\n' % (self.protocol_version, status)]
+        head.extend('%s: %s\r\n' % header for header in headers
+                    if header[0].lower() != 'content-length')
+        head.append('Content-Length: %d\r\n\r\n' % len(body))
+        # A single write, so the response is not split in several packets
+        self.wfile.write(''.join(head).encode('latin-1') + body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(app, host='127.0.0.1', port=0):
+    """Serve a WSGI app over HTTP from a background thread.
+
+    :returns: the HTTP server, whose server_address holds the port it
+              listens on. Call its shutdown method to stop it.
+    """
+    server = http_server.ThreadingHTTPServer((host, port), _RequestHandler)
+    server.daemon_threads = True
+    server.app = app
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8042)
+    parser.add_argument('--admin-token', action='append', default=[],
+                        help='Token of an admin, may be repeated')
+    args = parser.parse_args(argv)
+    server = serve(AodhSimulator(admin_tokens=args.admin_token),
+                   args.host, args.port)
+    print('Serving the Aodh API on http://%s:%d' % server.server_address[:2])
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,242 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure the latency of the Gnocchi measures and aggregates read paths.
+
+The benchmark is run by tempest when [telemetry_benchmark] enabled is set,
+or directly against any Gnocchi endpoint, such as a local stand-in::
+
+    python -m telemetry_tempest_plugin.benchmarks.aggregates \
+        --endpoint http://127.0.0.1:8041 --metric-counts 10,100 \
+        --timespans 3600,86400
+
+The token must be an admin one, to create the archive policy.
+"""
+
+import argparse
+import datetime
+import json
+import math
+import sys
+
+from oslo_utils import timeutils
+from tempest.lib.common.utils import data_utils
+
+from telemetry_tempest_plugin.benchmarks import resources
+from telemetry_tempest_plugin.benchmarks import stats as bench_stats
+from telemetry_tempest_plugin.common import auth
+from telemetry_tempest_plugin.gnocchi.service import client as gnocchi
+
+# The granularities of the long archive policy, in seconds
+GRANULARITIES = (60, 3600, 86400)
+
+
+def _is_point(item):
+    return isinstance(item, list) and len(item) == 3 and isinstance(
+        item[0], str)
+
+
+def count_points(body):
+    """Count the [timestamp, granularity, value] points of a response."""
+    if isinstance(body, dict):
+        return sum(count_points(value) for value in body.values())
+    if isinstance(body, list):
+        if body and all(_is_point(item) for item in body):
+            return len(body)
+        return sum(count_points(item) for item in body)
+    return 0
+
+
+class AggregatesBenchmark(object):
+    """Time the read paths of long series, at each granularity.
+
+    The benchmark creates ``metric_count`` generic resources, each with a
+    metric of the tempest-bench-long-policy archive policy, spread over
+    ``groups`` user IDs. It fills the metrics with one measure per minute
+    over the last ``timespan`` seconds and makes the API aggregate them.
+    Then, for each granularity of the archive policy, it sends
+    ``query_count`` requests of each read path over the whole timespan:
+
+    * measures: /v1/metric/<id>/measures of one metric
+    * aggregates: /v1/aggregates of the mean and max across all the
+      metrics
+    * groupby: /v1/aggregates of the mean of the metrics of the resources
+      of the benchmark, grouped by user ID
+
+    The items of the results are the points returned.
+    """
+
+    metric = 'bench.metric'
+    groups = 10
+
+    def __init__(self, gnocchi_client, metric_count=10, timespan=3600,
+                 query_count=20, concurrency=10, batch_size=100):
+        self.gnocchi_client = gnocchi_client
+        self.metric_count = metric_count
+        self.timespan = timespan
+        self.query_count = query_count
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.prefix = data_utils.rand_name('bench-aggregates')
+        self.resource_ids = []
+        self.metric_ids = []
+        self.start = None
+
+    def _name(self, operation, granularity=None):
+        name = '%s[m=%d,t=%d' % (operation, self.metric_count, self.timespan)
+        if granularity is not None:
+            name += ',g=%d' % granularity
+        return name + ']'
+
+    def _run(self, name, func, calls):
+        stats, results = bench_stats.run_concurrently(
+            name, func, calls, self.concurrency)
+        stats.items = sum(count_points(r) for r in results if r is not None)
+        return stats
+
+    def create_resources(self):
+        stats, bodies = resources.create_resources(
+            self.gnocchi_client, self._name('create_resources'),
+            self.metric_count,
+            {self.metric: resources.LONG_ARCHIVE_POLICY['name']},
+            self.concurrency, attributes=self._attributes)
+        self.resource_ids = [body['id'] for body in bodies]
+        self.metric_ids = [body['metrics'][self.metric] for body in bodies]
+        return stats
+
+    def _attributes(self, index):
+        # the resources are spread over the groups, for groupby
+        return {'original_resource_id': self.prefix,
+                'user_id': '%s-%d' % (self.prefix, index % self.groups)}
+
+    def fill(self):
+        """Send the series, then aggregate them with refresh=true."""
+        now = timeutils.utcnow().replace(second=0, microsecond=0)
+        self.start = now - datetime.timedelta(seconds=self.timespan)
+        points = self.timespan // 60
+
+        def series():
+            for i in range(points):
+                yield resources.measure(
+                    50 + 50 * math.sin(i * math.pi / 720),
+                    self.start + datetime.timedelta(minutes=i))
+
+        # The series are generated while they are streamed, so that long
+        # ones are sent in one request per batch of metrics
+        calls = [([(metric_id, series()) for metric_id in batch],)
+                 for batch in resources.chunks(self.metric_ids,
+                                               self.batch_size)]
+        stats = bench_stats.run_concurrently(
+            self._name('fill'), self.gnocchi_client.stream_metrics_measures,
+            calls, self.concurrency)[0]
+        stats.items = points * len(self.metric_ids)
+
+        def refresh(metric_id):
+            return self.gnocchi_client.show_measures(
+                metric_id, refresh=True, granularity=GRANULARITIES[0],
+                start=self.start.isoformat())
+
+        return [stats, self._run(self._name('refresh'), refresh,
+                                 [(m,) for m in self.metric_ids])]
+
+    def query(self, granularity):
+        start = self.start.isoformat()
+        metrics = ' '.join('(%s mean)' % metric_id
+                           for metric_id in self.metric_ids)
+
+        def measures(index):
+            return self.gnocchi_client.show_measures(
+                self.metric_ids[index % len(self.metric_ids)],
+                granularity=granularity, start=start)
+
+        def aggregates(index):
+            operation = ('mean', 'max')[index % 2]
+            return self.gnocchi_client.aggregates(
+                '(aggregate %s (metric %s))' % (operation, metrics),
+                granularity=granularity, start=start)
+
+        def groupby(index):
+            return self.gnocchi_client.aggregates(
+                '(aggregate mean (metric %s mean))' % self.metric,
+                resource_type='generic',
+                search={'=': {'original_resource_id': self.prefix}},
+                groupby=['user_id'], granularity=granularity, start=start)
+
+        calls = [(i,) for i in range(self.query_count)]
+        return [self._run(self._name(name, granularity), func, calls)
+                for name, func in [('measures', measures),
+                                   ('aggregates', aggregates),
+                                   ('groupby', groupby)]]
+
+    def cleanup(self):
+        if self.resource_ids:
+            resources.delete_resources(self.gnocchi_client,
+                                       self.resource_ids, self.batch_size)
+            self.resource_ids = []
+            self.metric_ids = []
+
+    def run(self):
+        """Run the benchmark and return its LatencyStats."""
+        resources.ensure_archive_policy(self.gnocchi_client,
+                                        resources.LONG_ARCHIVE_POLICY)
+        results = []
+        try:
+            results.append(self.create_resources())
+            results.extend(self.fill())
+            for granularity in GRANULARITIES:
+                results.extend(self.query(granularity))
+        finally:
+            self.cleanup()
+        return results
+
+
+def _integers(value):
+    return [int(item) for item in value.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoint', required=True,
+                        help='URL of the Gnocchi API')
+    parser.add_argument('--token', default='benchmark',
+                        help='Keystone token to authenticate with')
+    parser.add_argument('--metric-counts', type=_integers, default=[10],
+                        help='Comma separated numbers of metrics')
+    parser.add_argument('--timespans', type=_integers, default=[3600],
+                        help='Comma separated lengths of the series, in '
+                             'seconds')
+    parser.add_argument('--query-count', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--json', action='store_true',
+                        help='Print the results as JSON')
+    args = parser.parse_args(argv)
+
+    gnocchi_client = gnocchi.GnocchiClient(
+        auth.StaticAuthProvider(args.endpoint, args.token),
+        'metric', 'RegionOne', keepalive=True, pool_size=args.concurrency)
+    results = []
+    for count in args.metric_counts:
+        for timespan in args.timespans:
+            results.extend(AggregatesBenchmark(
+                gnocchi_client, metric_count=count, timespan=timespan,
+                query_count=args.query_count, concurrency=args.concurrency,
+                batch_size=args.batch_size).run())
+    if args.json:
+        print(json.dumps([s.to_dict() for s in results], indent=2))
+    else:
+        print(bench_stats.format_report(results))
+    return 1 if any(s.errors for s in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure the latency and throughput of the Aodh alarms API.
+
+The benchmark is run by tempest when [telemetry_benchmark] enabled is set,
+or directly against any Aodh endpoint, such as a local stand-in::
+
+    python -m telemetry_tempest_plugin.benchmarks.alarming \
+        --endpoint http://127.0.0.1:8042 --alarm-counts 1000,10000
+
+or against the in-memory Aodh simulator, started in-process::
+
+    python -m telemetry_tempest_plugin.benchmarks.alarming --simulator
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+
+from tempest.lib.common.utils import data_utils
+
+from telemetry_tempest_plugin.aodh.service import client
+from telemetry_tempest_plugin.aodh import simulator
+from telemetry_tempest_plugin.benchmarks import stats as bench_stats
+from telemetry_tempest_plugin.common import auth
+from telemetry_tempest_plugin.common import metrics
+
+ALARM_RULE = {
+    "event_type": "compute.instance.*",
+    "query": [],
+}
+
+
+class AlarmingBenchmark(object):
+    """Drive an AlarmingClient through the main alarm operations.
+
+    Each operation is run with ``concurrency`` requests in flight:
+
+    * create: creates ``alarm_count`` alarms
+    * list_filtered: ``query_count`` listings filtered on an alarm name
+    * paginate: ``concurrency`` walks through all the alarms of the project,
+      sorted on name and id, ``page_size`` alarms per page
+    * set_state: sets the state of every alarm
+    * history: gets the history of every alarm
+    * delete: deletes every alarm
+    """
+
+    sort = ['name:asc', 'alarm_id:asc']
+
+    def __init__(self, client, alarm_count=1000, concurrency=10,
+                 page_size=100, query_count=100):
+        self.client = client
+        self.alarm_count = alarm_count
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.query_count = query_count
+        self.prefix = data_utils.rand_name('bench')
+        self.alarm_ids = []
+
+    def _name(self, index):
+        return '%s-%08d' % (self.prefix, index)
+
+    def _stats_name(self, operation):
+        return '%s[%d]' % (operation, self.alarm_count)
+
+    def _run(self, name, func, calls):
+        return bench_stats.run_concurrently(self._stats_name(name), func,
+                                            calls, self.concurrency)
+
+    def create(self):
+        def create(index):
+            return self.client.create_alarm(
+                name=self._name(index), type='event', event_rule=ALARM_RULE)
+
+        stats, bodies = self._run(
+            'create', create, [(i,) for i in range(self.alarm_count)])
+        self.alarm_ids = [b['alarm_id'] for b in bodies if b is not None]
+        return stats
+
+    def list_filtered(self):
+        calls = [(['name', 'eq', self._name(i % self.alarm_count)],)
+                 for i in range(self.query_count)]
+        return self._run('list_filtered', self.client.list_alarms, calls)[0]
+
+    def paginate(self):
+        stats = bench_stats.LatencyStats(self._stats_name('paginate'))
+
+        def walk():
+            marker = None
+            while True:
+                start = time.monotonic()
+                try:
+                    page = self.client.list_alarms(
+                        sort=self.sort, limit=self.page_size, marker=marker)
+                except Exception:
+                    stats.add(time.monotonic() - start, error=True)
+                    return
+                stats.add(time.monotonic() - start)
+                if len(page) < self.page_size:
+                    return
+                marker = page[-1]['alarm_id']
+
+        start = time.monotonic()
+        walkers = [threading.Thread(target=walk)
+                   for i in range(self.concurrency)]
+        for walker in walkers:
+            walker.start()
+        for walker in walkers:
+            walker.join()
+        stats.elapsed = time.monotonic() - start
+        return stats
+
+    def set_state(self):
+        calls = [(alarm_id, 'ok' if i % 2 else 'alarm')
+                 for i, alarm_id in enumerate(self.alarm_ids)]
+        return self._run('set_state', self.client.alarm_set_state, calls)[0]
+
+    def history(self):
+        return self._run('history', self.client.show_alarm_history,
+                         [(alarm_id,) for alarm_id in self.alarm_ids])[0]
+
+    def delete(self):
+        stats = self._run('delete', self.client.delete_alarm,
+                          [(alarm_id,) for alarm_id in self.alarm_ids])[0]
+        self.alarm_ids = []
+        return stats
+
+    def run(self):
+        """Run every operation, in order, and return their LatencyStats."""
+        results = []
+        try:
+            for operation in (self.create, self.list_filtered,
+                              self.paginate, self.set_state, self.history):
+                results.append(operation())
+        finally:
+            results.append(self.delete())
+        return results
+
+
+def _integers(value):
+    return [int(item) for item in value.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--endpoint', help='URL of the Aodh API')
+    target.add_argument('--simulator', action='store_true',
+                        help='Run against an in-memory Aodh simulator')
+    parser.add_argument('--token', default='benchmark',
+                        help='Keystone token to authenticate with')
+    parser.add_argument('--alarm-counts', type=_integers, default=[1000],
+                        help='Comma separated numbers of alarms, one run '
+                             'per number')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--query-count', type=int, default=100)
+    parser.add_argument('--json', action='store_true',
+                        help='Print the results as JSON')
+    parser.add_argument('--client-metrics', metavar='FILE',
+                        help='Write the request metrics of the client to '
+                             'FILE, as Prometheus text if its name ends '
+                             'with .prom, as JSON otherwise')
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.simulator:
+        server = simulator.serve(simulator.AodhSimulator())
+        args.endpoint = 'http://%s:%d' % server.server_address[:2]
+    registry = metrics.Registry() if args.client_metrics else None
+    alarming_client = client.AlarmingClient(
+        auth.StaticAuthProvider(args.endpoint, args.token),
+        'alarming', 'RegionOne',
+        keepalive=True, pool_size=args.concurrency, metrics=registry)
+    results = []
+    for count in args.alarm_counts:
+        results.extend(AlarmingBenchmark(
+            alarming_client, alarm_count=count,
+            concurrency=args.concurrency, page_size=args.page_size,
+            query_count=args.query_count).run())
+    if server is not None:
+        server.shutdown()
+    if registry is not None:
+        registry.write(args.client_metrics)
+    if args.json:
+        print(json.dumps([s.to_dict() for s in results], indent=2))
+    else:
+        print(bench_stats.format_report(results))
+    return 1 if any(s.errors for s in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
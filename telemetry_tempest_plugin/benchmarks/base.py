@@ -0,0 +1,64 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+from oslo_log import log as logging
+from tempest import config
+import tempest.test
+from testtools import content
+
+from telemetry_tempest_plugin.aodh.service import client
+from telemetry_tempest_plugin.benchmarks import stats as bench_stats
+
+CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+
+class BenchmarkReportMixin(object):
+    """Report the results of the benchmarks of a test case."""
+
+    def report(self, title, results):
+        """Log the results, attach them to the test and check for errors."""
+        report = bench_stats.format_report(results)
+        LOG.info("%s:\n%s", title, report)
+        self.addDetail('benchmark', content.text_content(report))
+        self.addDetail('benchmark.json', content.text_content(
+            json.dumps([s.to_dict() for s in results])))
+        self.assertEqual([], [s.name for s in results if s.errors],
+                         "Some benchmark operations failed")
+
+
+class BaseGnocchiBenchmarkTest(BenchmarkReportMixin,
+                               tempest.test.BaseTestCase):
+    """Base test case class for the benchmarks using Gnocchi."""
+
+    # admin, to create the archive policies and resource types
+    credentials = ['admin']
+    client_manager = client.Manager
+    services = ['gnocchi']
+
+    @classmethod
+    def skip_checks(cls):
+        super(BaseGnocchiBenchmarkTest, cls).skip_checks()
+        if not CONF.telemetry_benchmark.enabled:
+            raise cls.skipException("Telemetry benchmarks are disabled")
+        for name in cls.services:
+            if not getattr(CONF.service_available, name, False):
+                raise cls.skipException("%s support is required" %
+                                        name.capitalize())
+
+    @classmethod
+    def setup_clients(cls):
+        super(BaseGnocchiBenchmarkTest, cls).setup_clients()
+        cls.alarming_client = cls.os_admin.alarming_client
+        cls.gnocchi_client = cls.os_admin.gnocchi_client
@@ -0,0 +1,233 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure how fast the Aodh evaluator transitions Gnocchi threshold alarms.
+
+The benchmark is run by tempest when [telemetry_benchmark] enabled is set,
+or directly against any Aodh and Gnocchi endpoints::
+
+    python -m telemetry_tempest_plugin.benchmarks.evaluator \
+        --aodh-endpoint http://127.0.0.1:8042 \
+        --gnocchi-endpoint http://127.0.0.1:8041 --alarm-counts 100,1000
+
+The token must be an admin one, to create the archive policy.
+"""
+
+import argparse
+import datetime
+import json
+import sys
+import time
+
+from oslo_log import log as logging
+from oslo_utils import timeutils
+from tempest.lib.common.utils import data_utils
+
+from telemetry_tempest_plugin.aodh.service import client
+from telemetry_tempest_plugin.benchmarks import resources
+from telemetry_tempest_plugin.benchmarks import stats as bench_stats
+from telemetry_tempest_plugin.common import auth
+from telemetry_tempest_plugin.gnocchi.service import client as gnocchi
+
+LOG = logging.getLogger(__name__)
+
+
+def _timestamp(value):
+    # Aodh gives naive UTC times
+    dt = timeutils.normalize_time(timeutils.parse_isotime(value))
+    return dt.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+class EvaluatorBenchmark(object):
+    """Measure the time the evaluator takes to transition N alarms.
+
+    The benchmark creates ``alarm_count`` generic resources, each with a
+    metric of the tempest-test-policy archive policy, and a
+    gnocchi_resources_threshold alarm on each metric. It then sends a
+    measure above the threshold to every metric, ``batch_size`` resources
+    per request, every ``push_interval`` seconds, until all the alarms are
+    in the alarm state or ``timeout`` seconds have elapsed.
+
+    The evaluate result holds the time each alarm took to transition, from
+    the first measures sent to its state_timestamp, and the alarms which
+    did not transition as errors. Its throughput is in alarms per second.
+    """
+
+    metric = 'bench.metric'
+    granularity = 20
+    threshold = 5.0
+    value = 10.0
+
+    def __init__(self, alarming_client, gnocchi_client, alarm_count=100,
+                 concurrency=10, batch_size=100, push_interval=10,
+                 timeout=900, poll_interval=5, page_size=100):
+        self.alarming_client = alarming_client
+        self.gnocchi_client = gnocchi_client
+        self.alarm_count = alarm_count
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.push_interval = push_interval
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.page_size = page_size
+        self.prefix = data_utils.rand_name('bench-eval')
+        self.resource_ids = []
+        self.alarm_ids = []
+
+    def _name(self, operation):
+        return '%s[%d]' % (operation, self.alarm_count)
+
+    def _run(self, name, func, calls):
+        return bench_stats.run_concurrently(self._name(name), func, calls,
+                                            self.concurrency)
+
+    def create_resources(self):
+        stats, bodies = resources.create_resources(
+            self.gnocchi_client, self._name('create_resources'),
+            self.alarm_count,
+            {self.metric: resources.ARCHIVE_POLICY['name']},
+            self.concurrency)
+        self.resource_ids = [body['id'] for body in bodies]
+        return stats
+
+    def create_alarms(self):
+        def create(index, resource_id):
+            return self.alarming_client.create_alarm(
+                name='%s-%08d' % (self.prefix, index),
+                type='gnocchi_resources_threshold',
+                gnocchi_resources_threshold_rule={
+                    'metric': self.metric,
+                    'resource_id': resource_id,
+                    'resource_type': 'generic',
+                    'aggregation_method': 'mean',
+                    'granularity': self.granularity,
+                    'threshold': self.threshold,
+                    'comparison_operator': 'ge',
+                    'evaluation_periods': 1,
+                })
+
+        stats, bodies = self._run('create_alarms', create,
+                                  list(enumerate(self.resource_ids)))
+        self.alarm_ids = [b['alarm_id'] for b in bodies if b is not None]
+        return stats
+
+    def _push_measures(self, push_stats):
+        measures = [resources.measure(self.value)]
+        calls = [({resource_id: {self.metric: measures}
+                   for resource_id in batch},)
+                 for batch in resources.chunks(self.resource_ids,
+                                               self.batch_size)]
+        stats = self._run('push_measures',
+                          self.gnocchi_client.add_resources_measures,
+                          calls)[0]
+        push_stats.latencies.extend(stats.latencies)
+        push_stats.errors += stats.errors
+        push_stats.elapsed += stats.elapsed
+        push_stats.items += len(self.resource_ids)
+
+    def evaluate(self):
+        """Send measures until all the alarms transition.
+
+        :returns: the LatencyStats of the transitions, and those of the
+                  requests sending measures.
+        """
+        stats = bench_stats.LatencyStats(self._name('evaluate'))
+        push_stats = bench_stats.LatencyStats(self._name('push_measures'))
+        pending = set(self.alarm_ids)
+        start = time.time()
+        deadline = time.monotonic() + self.timeout
+        next_push = time.monotonic()
+        while pending and time.monotonic() < deadline:
+            if time.monotonic() >= next_push:
+                self._push_measures(push_stats)
+                next_push = time.monotonic() + self.push_interval
+            time.sleep(self.poll_interval)
+            for alarm in self.alarming_client.iter_alarms(
+                    query=['state', 'eq', 'alarm'],
+                    page_size=self.page_size):
+                if alarm['alarm_id'] in pending:
+                    pending.discard(alarm['alarm_id'])
+                    stats.add(max(_timestamp(alarm['state_timestamp'])
+                                  - start, 0.0))
+        if pending:
+            LOG.warning("%d alarms did not transition within %ds",
+                        len(pending), self.timeout)
+        stats.errors = len(pending)
+        stats.elapsed = max(stats.latencies) if stats.latencies else 0.0
+        return stats, push_stats
+
+    def cleanup(self):
+        if self.alarm_ids:
+            self._run('delete_alarms', self.alarming_client.delete_alarm,
+                      [(alarm_id,) for alarm_id in self.alarm_ids])
+            self.alarm_ids = []
+        if self.resource_ids:
+            resources.delete_resources(self.gnocchi_client,
+                                       self.resource_ids, self.batch_size)
+            self.resource_ids = []
+
+    def run(self):
+        """Run the benchmark and return its LatencyStats."""
+        resources.ensure_archive_policy(self.gnocchi_client)
+        results = []
+        try:
+            results.append(self.create_resources())
+            results.append(self.create_alarms())
+            stats, push_stats = self.evaluate()
+            results.extend([push_stats, stats])
+        finally:
+            self.cleanup()
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--aodh-endpoint', required=True,
+                        help='URL of the Aodh API')
+    parser.add_argument('--gnocchi-endpoint', required=True,
+                        help='URL of the Gnocchi API')
+    parser.add_argument('--token', default='benchmark',
+                        help='Keystone token to authenticate with')
+    parser.add_argument('--alarm-counts', default='100',
+                        help='Comma separated numbers of alarms, one run '
+                             'per number')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--push-interval', type=int, default=10)
+    parser.add_argument('--timeout', type=int, default=900)
+    parser.add_argument('--json', action='store_true',
+                        help='Print the results as JSON')
+    args = parser.parse_args(argv)
+
+    alarming_client = client.AlarmingClient(
+        auth.StaticAuthProvider(args.aodh_endpoint, args.token),
+        'alarming', 'RegionOne',
+        keepalive=True, pool_size=args.concurrency)
+    gnocchi_client = gnocchi.GnocchiClient(
+        auth.StaticAuthProvider(args.gnocchi_endpoint, args.token),
+        'metric', 'RegionOne',
+        keepalive=True, pool_size=args.concurrency)
+    results = []
+    for count in args.alarm_counts.split(','):
+        results.extend(EvaluatorBenchmark(
+            alarming_client, gnocchi_client, alarm_count=int(count),
+            concurrency=args.concurrency, batch_size=args.batch_size,
+            push_interval=args.push_interval, timeout=args.timeout).run())
+    if args.json:
+        print(json.dumps([s.to_dict() for s in results], indent=2))
+    else:
+        print(bench_stats.format_report(results))
+    return 1 if any(s.errors for s in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure the ingestion rate of the Gnocchi batch measures APIs.
+
+The benchmark is run by tempest when [telemetry_benchmark] enabled is set,
+or directly against any Gnocchi endpoint, such as a local stand-in::
+
+    python -m telemetry_tempest_plugin.benchmarks.ingestion \
+        --endpoint http://127.0.0.1:8041 --metric-counts 1000,10000 \
+        --batch-sizes 10,100,1000 --concurrencies 1,10
+
+The token must be an admin one, to create the archive policy.
+"""
+
+import argparse
+import datetime
+import json
+import sys
+import time
+
+from oslo_utils import timeutils
+
+from telemetry_tempest_plugin.benchmarks import resources
+from telemetry_tempest_plugin.benchmarks import stats as bench_stats
+from telemetry_tempest_plugin.common import auth
+from telemetry_tempest_plugin.gnocchi.service import client as gnocchi
+
+APIS = ('resources', 'metrics')
+
+
+class IngestionBenchmark(object):
+    """Sweep the batch measures APIs over batch sizes and concurrencies.
+
+    The benchmark creates ``metric_count`` generic resources, each with a
+    metric of the tempest-test-policy archive policy. Then, for each of
+    ``apis``, ``batch_sizes`` and ``concurrencies``, it sends ``points``
+    measures one second apart to every metric, ``batch_size`` metrics per
+    request, and reports the ingestion rate in measures per second.
+
+    After each run, it checks how long the measures take to be queryable
+    at the 1 second granularity, on ``sample`` metrics for each path:
+
+    * refresh: the latency of a request with refresh=true, which makes the
+      API aggregate the measures itself
+    * metricd: the time from the end of the run until the measures are
+      aggregated by metricd, polling without refresh
+    """
+
+    metric = 'bench.metric'
+
+    def __init__(self, gnocchi_client, metric_count=1000, batch_sizes=(100,),
+                 concurrencies=(10,), apis=APIS, points=10, sample=10,
+                 timeout=300, poll_interval=1, concurrency=10):
+        if not 0 < points <= 60:
+            # the archive policy keeps 60 points at the 1 second granularity
+            raise ValueError("points must be between 1 and 60")
+        self.gnocchi_client = gnocchi_client
+        self.metric_count = metric_count
+        self.batch_sizes = batch_sizes
+        self.concurrencies = concurrencies
+        self.apis = apis
+        self.points = points
+        self.sample = sample
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self.resource_ids = []
+        self.metric_ids = {}
+        self._next_timestamp = None
+
+    def create_resources(self):
+        stats, bodies = resources.create_resources(
+            self.gnocchi_client, 'create_resources[%d]' % self.metric_count,
+            self.metric_count,
+            {self.metric: resources.ARCHIVE_POLICY['name']},
+            self.concurrency)
+        self.resource_ids = [body['id'] for body in bodies]
+        self.metric_ids = {body['id']: body['metrics'][self.metric]
+                           for body in bodies}
+        return stats
+
+    def _timestamps(self):
+        # The measures of a run must be newer than those of the previous
+        # runs, or they would fall out of the back window of the metrics
+        now = timeutils.utcnow().replace(microsecond=0)
+        start = max(now, self._next_timestamp or now)
+        self._next_timestamp = start + datetime.timedelta(
+            seconds=self.points)
+        return start, [start + datetime.timedelta(seconds=i)
+                       for i in range(self.points)]
+
+    def _batches(self, api, batch_size, timestamps):
+        measures = [resources.measure(float(i), timestamp)
+                    for i, timestamp in enumerate(timestamps)]
+        for batch in resources.chunks(self.resource_ids, batch_size):
+            if api == 'resources':
+                yield ({resource_id: {self.metric: measures}
+                        for resource_id in batch},)
+            else:
+                yield ({self.metric_ids[resource_id]: measures
+                        for resource_id in batch},)
+
+    def _visible(self, metric_id, start, refresh):
+        measures = self.gnocchi_client.show_measures(
+            metric_id, refresh=refresh, granularity=1,
+            start=start.isoformat())
+        return len(measures) >= self.points
+
+    def _check_refresh(self, name, metric_ids, start):
+        def check(metric_id):
+            if not self._visible(metric_id, start, refresh=True):
+                raise AssertionError("Measures of %s not aggregated" %
+                                     metric_id)
+
+        return bench_stats.run_concurrently(
+            name, check, [(metric_id,) for metric_id in metric_ids],
+            self.concurrency)[0]
+
+    def _wait_metricd(self, name, metric_ids, start, ingested):
+        stats = bench_stats.LatencyStats(name)
+
+        def wait(metric_id):
+            while True:
+                try:
+                    visible = self._visible(metric_id, start, refresh=False)
+                except Exception:
+                    visible = False
+                waited = time.monotonic() - ingested
+                if visible or waited > self.timeout:
+                    stats.add(waited, error=not visible)
+                    return
+                time.sleep(self.poll_interval)
+
+        bench_stats.run_concurrently(
+            name, wait, [(metric_id,) for metric_id in metric_ids],
+            len(metric_ids) or 1)
+        stats.elapsed = max(stats.latencies) if stats.latencies else 0.0
+        return stats
+
+    def ingest(self, api, batch_size, concurrency):
+        """Send one round of measures, then check when they are visible."""
+        suffix = '[m=%d,b=%d,c=%d]' % (self.metric_count, batch_size,
+                                       concurrency)
+        start, timestamps = self._timestamps()
+        stats = bench_stats.run_concurrently(
+            api + suffix,
+            getattr(self.gnocchi_client, 'add_%s_measures' % api),
+            list(self._batches(api, batch_size, timestamps)),
+            concurrency)[0]
+        ingested = time.monotonic()
+        stats.items = self.metric_count * self.points
+
+        # refresh only aggregates the metrics it is asked for, so the
+        # metrics checked with it and those left to metricd are distinct
+        sample = [self.metric_ids[resource_id]
+                  for resource_id in self.resource_ids[:2 * self.sample]]
+        refresh = self._check_refresh('refresh' + suffix,
+                                      sample[::2], start)
+        metricd = self._wait_metricd('metricd' + suffix,
+                                     sample[1::2], start, ingested)
+        return [stats, refresh, metricd]
+
+    def cleanup(self):
+        if self.resource_ids:
+            resources.delete_resources(self.gnocchi_client,
+                                       self.resource_ids,
+                                       max(self.batch_sizes))
+            self.resource_ids = []
+            self.metric_ids = {}
+
+    def run(self):
+        """Run the benchmark and return its LatencyStats."""
+        resources.ensure_archive_policy(self.gnocchi_client)
+        results = []
+        try:
+            results.append(self.create_resources())
+            for api in self.apis:
+                for batch_size in self.batch_sizes:
+                    for concurrency in self.concurrencies:
+                        results.extend(self.ingest(api, batch_size,
+                                                   concurrency))
+        finally:
+            self.cleanup()
+        return results
+
+
+def _integers(value):
+    return [int(item) for item in value.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoint', required=True,
+                        help='URL of the Gnocchi API')
+    parser.add_argument('--token', default='benchmark',
+                        help='Keystone token to authenticate with')
+    parser.add_argument('--metric-counts', type=_integers, default=[1000],
+                        help='Comma separated numbers of metrics, one sweep '
+                             'per number')
+    parser.add_argument('--batch-sizes', type=_integers, default=[100])
+    parser.add_argument('--concurrencies', type=_integers, default=[10])
+    parser.add_argument('--apis', default=','.join(APIS),
+                        help='Comma separated batch APIs to sweep, among '
+                             '%s' % ', '.join(APIS))
+    parser.add_argument('--points', type=int, default=10,
+                        help='Number of measures sent to each metric per '
+                             'run, at most 60')
+    parser.add_argument('--sample', type=int, default=10,
+                        help='Number of metrics checked for each of the '
+                             'refresh and metricd paths')
+    parser.add_argument('--timeout', type=int, default=300)
+    parser.add_argument('--json', action='store_true',
+                        help='Print the results as JSON')
+    args = parser.parse_args(argv)
+
+    pool_size = max(args.concurrencies + [10])
+    gnocchi_client = gnocchi.GnocchiClient(
+        auth.StaticAuthProvider(args.endpoint, args.token),
+        'metric', 'RegionOne', keepalive=True, pool_size=pool_size)
+    results = []
+    for count in args.metric_counts:
+        results.extend(IngestionBenchmark(
+            gnocchi_client, metric_count=count,
+            batch_sizes=args.batch_sizes, concurrencies=args.concurrencies,
+            apis=args.apis.split(','), points=args.points,
+            sample=args.sample, timeout=args.timeout).run())
+    if args.json:
+        print(json.dumps([s.to_dict() for s in results], indent=2))
+    else:
+        print(bench_stats.format_report(results))
+    return 1 if any(s.errors for s in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Gnocchi fixtures shared by the benchmarks."""
+
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
+from tempest.lib import exceptions as lib_exc
+
+from telemetry_tempest_plugin.benchmarks import stats as bench_stats
+
+# The archive policy of the Gnocchi threshold alarm scenario
+ARCHIVE_POLICY = {
+    'name': 'tempest-test-policy',
+    'back_window': 0,
+    'definition': [
+        {'granularity': '1 second', 'points': 60},
+        {'granularity': '20 second', 'timespan': '1 minute'},
+        {'points': 5, 'timespan': '5 minute'},
+    ],
+    'aggregation_methods': ['mean', 'min', 'max'],
+}
+
+# An archive policy keeping long series, to benchmark reads at several
+# granularities
+LONG_ARCHIVE_POLICY = {
+    'name': 'tempest-bench-long-policy',
+    'back_window': 0,
+    'definition': [
+        {'granularity': '1 minute', 'timespan': '7 day'},
+        {'granularity': '1 hour', 'timespan': '90 day'},
+        {'granularity': '1 day', 'timespan': '365 day'},
+    ],
+    'aggregation_methods': ['mean', 'min', 'max'],
+}
+
+
+def ensure_archive_policy(gnocchi_client, policy=ARCHIVE_POLICY):
+    """Create an archive policy, unless it already exists."""
+    try:
+        gnocchi_client.create_archive_policy(**policy)
+    except lib_exc.Conflict:
+        pass
+
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def create_resources(gnocchi_client, name, count, metrics, concurrency,
+                     resource_type='generic', attributes=None):
+    """Create resources with the same metrics, concurrency at a time.
+
+    :param metrics: a dict mapping metric names to the archive policy names
+                    of the metrics created with each resource.
+    :param attributes: a function returning the other attributes of the
+                       resource of the index it is given.
+    :returns: a (LatencyStats, resources) tuple. The resources which could
+              not be created are left out.
+    """
+    metrics = {metric: {'archive_policy_name': policy}
+               for metric, policy in metrics.items()}
+
+    def create(index):
+        kwargs = attributes(index) if attributes else {}
+        return gnocchi_client.create_resource(
+            resource_type, id=uuidutils.generate_uuid(), metrics=metrics,
+            **kwargs)
+
+    stats, bodies = bench_stats.run_concurrently(
+        name, create, [(i,) for i in range(count)], concurrency)
+    return stats, [body for body in bodies if body is not None]
+
+
+def delete_resources(gnocchi_client, resource_ids, batch_size,
+                     resource_type='generic'):
+    """Delete resources, batch_size of them per request."""
+    for batch in chunks(list(resource_ids), batch_size):
+        gnocchi_client.delete_resources(resource_type,
+                                        {'in': {'id': batch}})
+
+
+def measure(value, timestamp=None):
+    if timestamp is None:
+        timestamp = timeutils.utcnow()
+    return {'timestamp': timestamp.isoformat(), 'value': value}
@@ -0,0 +1,239 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure how Gnocchi resource searches scale with the number of resources.
+
+The benchmark is run by tempest when [telemetry_benchmark] enabled is set,
+or directly against any Gnocchi endpoint, such as a local stand-in::
+
+    python -m telemetry_tempest_plugin.benchmarks.search \
+        --endpoint http://127.0.0.1:8041 --resource-counts 10000,100000
+
+The token must be an admin one, to create the resource types.
+"""
+
+import argparse
+import json
+import sys
+
+from oslo_utils import uuidutils
+from tempest.lib import exceptions as lib_exc
+
+from telemetry_tempest_plugin.benchmarks import resources
+from telemetry_tempest_plugin.benchmarks import stats as bench_stats
+from telemetry_tempest_plugin.common import auth
+from telemetry_tempest_plugin.gnocchi.service import client as gnocchi
+
+# The resource types of gnocchi_gabbits/search-resource.yaml, under names
+# of their own so that the benchmark and the scenario can run together
+INSTANCE_TYPE = {
+    'name': 'tempest-bench-instance-like',
+    'attributes': {
+        'display_name': {'type': 'string', 'required': True},
+        'flavor_id': {'type': 'string', 'required': True},
+        'host': {'type': 'string', 'required': True},
+        'image_ref': {'type': 'string', 'required': False},
+        'server_group': {'type': 'string', 'required': False},
+    },
+}
+IMAGE_TYPE = {
+    'name': 'tempest-bench-image-like',
+    'attributes': {
+        'name': {'type': 'string', 'required': True},
+        'disk_format': {'type': 'string', 'required': True},
+        'container_format': {'type': 'string', 'required': True},
+    },
+}
+
+
+class SearchBenchmark(object):
+    """Time the searches of search-resource.yaml over many resources.
+
+    The benchmark creates ``resource_count`` resources, one image-like
+    for every ``images_ratio`` of them and instance-like ones otherwise,
+    spread over ``users`` users, ``projects`` projects and ``hosts``
+    hosts. It then walks through the results of each search,
+    ``page_size`` resources per page, ``query_count`` times.
+
+    The latencies are those of the full walks, and the items the resources
+    returned, so that items/s gives the streaming throughput of the
+    results.
+    """
+
+    users = 100
+    projects = 10
+    hosts = 50
+    images_ratio = 10
+
+    def __init__(self, gnocchi_client, resource_count=10000, query_count=10,
+                 page_size=100, concurrency=10, batch_size=100):
+        self.gnocchi_client = gnocchi_client
+        self.resource_count = resource_count
+        self.query_count = query_count
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.user_ids = [uuidutils.generate_uuid()
+                         for i in range(self.users)]
+        self.project_ids = [uuidutils.generate_uuid()
+                            for i in range(self.projects)]
+        self.resource_ids = {INSTANCE_TYPE['name']: [],
+                             IMAGE_TYPE['name']: []}
+
+    def _name(self, operation):
+        return '%s[%d]' % (operation, self.resource_count)
+
+    def _host(self, index):
+        return 'compute-%d-bench.localdomain' % (index % self.hosts)
+
+    def _owner(self, index):
+        return {'user_id': self.user_ids[index % self.users],
+                'project_id': self.project_ids[index % self.projects]}
+
+    def _image(self, index):
+        return dict(self._owner(index),
+                    name='bench-image-%d' % index,
+                    disk_format='qcow2', container_format='bare')
+
+    def _instance(self, index):
+        image_ids = self.resource_ids[IMAGE_TYPE['name']]
+        attributes = dict(self._owner(index),
+                          display_name='vm-bench-%d' % index,
+                          flavor_id=str(index % 5),
+                          host=self._host(index))
+        if image_ids:
+            attributes['image_ref'] = image_ids[index % len(image_ids)]
+        return attributes
+
+    def _create(self, name, resource_type, count, attributes):
+        stats, bodies = resources.create_resources(
+            self.gnocchi_client, self._name('create_' + name), count, {},
+            self.concurrency,
+            resource_type=resource_type['name'], attributes=attributes)
+        self.resource_ids[resource_type['name']] = [b['id'] for b in bodies]
+        stats.items = len(bodies)
+        return stats
+
+    def create_resources(self):
+        for resource_type in (INSTANCE_TYPE, IMAGE_TYPE):
+            try:
+                self.gnocchi_client.create_resource_type(**resource_type)
+            except lib_exc.Conflict:
+                pass
+        images = self.resource_count // self.images_ratio
+        return [self._create('images', IMAGE_TYPE, images, self._image),
+                self._create('instances', INSTANCE_TYPE,
+                             self.resource_count - images, self._instance)]
+
+    def searches(self):
+        """The searches of search-resource.yaml, on the benchmark data."""
+        user_id = self.user_ids[1]
+        return [
+            ('user_id', 'generic', {'=': {'user_id': user_id}}),
+            ('type_and_user_id', 'generic', {'and': [
+                {'=': {'type': INSTANCE_TYPE['name']}},
+                {'=': {'user_id': self.user_ids[0]}}]}),
+            ('project_id', 'generic',
+             {'=': {'project_id': self.project_ids[0]}}),
+            ('like_host', INSTANCE_TYPE['name'],
+             {'like': {'host': 'compute-1-bench%'}}),
+            ('like_host_and_user_id', INSTANCE_TYPE['name'], {'and': [
+                {'like': {'host': 'compute-%-bench%'}},
+                {'=': {'user_id': self.user_ids[0]}}]}),
+            ('user_id_and_types', 'generic', {'and': [
+                {'=': {'user_id': user_id}},
+                {'or': [{'=': {'type': INSTANCE_TYPE['name']}},
+                        {'=': {'type': IMAGE_TYPE['name']}}]}]}),
+        ]
+
+    def search(self, name, resource_type, query):
+        def walk(index):
+            return sum(1 for resource in
+                       self.gnocchi_client.iter_search_resources(
+                           resource_type, query, sort='id:asc',
+                           page_size=self.page_size))
+
+        stats, counts = bench_stats.run_concurrently(
+            self._name('search_' + name), walk,
+            [(i,) for i in range(self.query_count)], self.concurrency)
+        stats.items = sum(count for count in counts if count is not None)
+        return stats
+
+    def cleanup(self):
+        for resource_type, resource_ids in self.resource_ids.items():
+            if resource_ids:
+                resources.delete_resources(self.gnocchi_client,
+                                           resource_ids, self.batch_size,
+                                           resource_type=resource_type)
+                self.resource_ids[resource_type] = []
+        for resource_type in (INSTANCE_TYPE, IMAGE_TYPE):
+            try:
+                self.gnocchi_client.delete_resource_type(
+                    resource_type['name'])
+            except lib_exc.NotFound:
+                pass
+            except lib_exc.BadRequest:
+                # still used by resources the benchmark could not delete
+                pass
+
+    def run(self):
+        """Run the benchmark and return its LatencyStats."""
+        results = []
+        try:
+            results.extend(self.create_resources())
+            for name, resource_type, query in self.searches():
+                results.append(self.search(name, resource_type, query))
+        finally:
+            self.cleanup()
+        return results
+
+
+def _integers(value):
+    return [int(item) for item in value.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoint', required=True,
+                        help='URL of the Gnocchi API')
+    parser.add_argument('--token', default='benchmark',
+                        help='Keystone token to authenticate with')
+    parser.add_argument('--resource-counts', type=_integers, default=[10000],
+                        help='Comma separated numbers of resources, one run '
+                             'per number')
+    parser.add_argument('--query-count', type=int, default=10)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--json', action='store_true',
+                        help='Print the results as JSON')
+    args = parser.parse_args(argv)
+
+    gnocchi_client = gnocchi.GnocchiClient(
+        auth.StaticAuthProvider(args.endpoint, args.token),
+        'metric', 'RegionOne', keepalive=True, pool_size=args.concurrency)
+    results = []
+    for count in args.resource_counts:
+        results.extend(SearchBenchmark(
+            gnocchi_client, resource_count=count,
+            query_count=args.query_count, page_size=args.page_size,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size).run())
+    if args.json:
+        print(json.dumps([s.to_dict() for s in results], indent=2))
+    else:
+        print(bench_stats.format_report(results))
+    return 1 if any(s.errors for s in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from concurrent import futures
+import math
+import threading
+import time
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+
+class LatencyStats(object):
+    """Latencies of a set of requests, and the throughput they achieved.
+
+    items counts what the requests carried, like measures or search results,
+    for the operations whose throughput is better given in items per second.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.errors = 0
+        self.elapsed = 0.0
+        self.items = 0
+        self._lock = threading.Lock()
+
+    def add(self, latency, error=False):
+        with self._lock:
+            self.latencies.append(latency)
+            if error:
+                self.errors += 1
+
+    def percentile(self, percent):
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        rank = max(int(math.ceil(percent / 100.0 * len(latencies))), 1)
+        return latencies[rank - 1]
+
+    @property
+    def ops_per_second(self):
+        if not self.elapsed:
+            return None
+        return len(self.latencies) / self.elapsed
+
+    @property
+    def items_per_second(self):
+        if not self.elapsed or not self.items:
+            return None
+        return self.items / self.elapsed
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'requests': len(self.latencies),
+            'errors': self.errors,
+            'elapsed': self.elapsed,
+            'ops_per_second': self.ops_per_second,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': max(self.latencies) if self.latencies else None,
+            'items': self.items,
+            'items_per_second': self.items_per_second,
+        }
+
+
+def run_concurrently(name, func, calls, concurrency):
+    """Call func with each item of calls as arguments, from a thread pool.
+
+    :param calls: an iterable of argument tuples, one per call.
+    :param concurrency: the number of calls in flight at the same time.
+    :return: a (LatencyStats, results) tuple. results holds the return value
+             of each call, in order, or None for those which raised.
+    """
+    stats = LatencyStats(name)
+
+    def timed_call(args):
+        start = time.monotonic()
+        try:
+            result = func(*args)
+        except Exception as e:
+            stats.add(time.monotonic() - start, error=True)
+            LOG.debug("%s request failed: %s", name, e)
+            return None
+        stats.add(time.monotonic() - start)
+        return result
+
+    start = time.monotonic()
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed_call, calls))
+    stats.elapsed = time.monotonic() - start
+    return stats, results
+
+
+def format_report(stats):
+    """Format a list of LatencyStats as a text table, latencies in ms."""
+    def ms(value):
+        return '-' if value is None else '%.1f' % (value * 1000)
+
+    def rate(value):
+        return '-' if value is None else '%.1f' % value
+
+    width = max([24] + [len(s.name) for s in stats])
+    lines = ['%-*s %8s %7s %9s %9s %9s %9s %9s %10s' % (
+        width, 'operation', 'requests', 'errors', 'ops/s',
+        'p50', 'p95', 'p99', 'max', 'items/s')]
+    for s in stats:
+        d = s.to_dict()
+        lines.append('%-*s %8d %7d %9s %9s %9s %9s %9s %10s' % (
+            width, d['name'], d['requests'], d['errors'],
+            rate(d['ops_per_second']),
+            ms(d['p50']), ms(d['p95']), ms(d['p99']), ms(d['max']),
+            rate(d['items_per_second'])))
+    return '\n'.join(lines)
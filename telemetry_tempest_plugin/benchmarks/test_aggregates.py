@@ -0,0 +1,36 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from tempest import config
+from tempest.lib import decorators
+
+from telemetry_tempest_plugin.benchmarks import aggregates
+from telemetry_tempest_plugin.benchmarks import base
+
+CONF = config.CONF
+
+
+class AggregatesBenchmarkTest(base.BaseGnocchiBenchmarkTest):
+
+    @decorators.idempotent_id('7b1e4d92-0a6c-4f35-b8d2-e94c13a5f608')
+    def test_aggregates_benchmark(self):
+        results = []
+        for count in CONF.telemetry_benchmark.aggregates_metric_counts:
+            for timespan in CONF.telemetry_benchmark.aggregates_timespans:
+                results.extend(aggregates.AggregatesBenchmark(
+                    self.gnocchi_client, metric_count=count,
+                    timespan=timespan,
+                    query_count=(
+                        CONF.telemetry_benchmark.aggregates_query_count),
+                    concurrency=CONF.telemetry_benchmark.concurrency,
+                    batch_size=CONF.telemetry_benchmark.batch_size).run())
+        self.report("Aggregates benchmark", results)
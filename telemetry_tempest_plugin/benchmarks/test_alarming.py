@@ -0,0 +1,42 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from tempest import config
+from tempest.lib import decorators
+
+from telemetry_tempest_plugin.aodh.api import base
+from telemetry_tempest_plugin.benchmarks import alarming
+from telemetry_tempest_plugin.benchmarks import base as bench_base
+
+CONF = config.CONF
+
+
+class AlarmingBenchmarkTest(bench_base.BenchmarkReportMixin,
+                            base.BaseAlarmingTest):
+
+    @classmethod
+    def skip_checks(cls):
+        super(AlarmingBenchmarkTest, cls).skip_checks()
+        if not CONF.telemetry_benchmark.enabled:
+            raise cls.skipException("Telemetry benchmarks are disabled")
+
+    @decorators.idempotent_id('af3cc42f-3955-4a09-81f3-119d0b6bcbcb')
+    def test_alarming_api_benchmark(self):
+        results = []
+        for count in CONF.telemetry_benchmark.alarm_counts:
+            results.extend(alarming.AlarmingBenchmark(
+                self.alarming_client,
+                alarm_count=count,
+                concurrency=CONF.telemetry_benchmark.concurrency,
+                page_size=CONF.telemetry_benchmark.page_size,
+                query_count=CONF.telemetry_benchmark.query_count).run())
+        self.report("Alarming API benchmark", results)
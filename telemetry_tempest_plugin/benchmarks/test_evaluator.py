@@ -0,0 +1,38 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from tempest import config
+from tempest.lib import decorators
+
+from telemetry_tempest_plugin.benchmarks import base
+from telemetry_tempest_plugin.benchmarks import evaluator
+
+CONF = config.CONF
+
+
+class EvaluatorBenchmarkTest(base.BaseGnocchiBenchmarkTest):
+
+    services = ['aodh', 'gnocchi']
+
+    @decorators.idempotent_id('5d0b8e4c-7f2a-4e61-9c3b-a18f06d2e7b9')
+    def test_evaluator_benchmark(self):
+        results = []
+        for count in CONF.telemetry_benchmark.evaluator_alarm_counts:
+            results.extend(evaluator.EvaluatorBenchmark(
+                self.alarming_client, self.gnocchi_client,
+                alarm_count=count,
+                concurrency=CONF.telemetry_benchmark.concurrency,
+                batch_size=CONF.telemetry_benchmark.batch_size,
+                push_interval=CONF.telemetry_benchmark.measure_push_interval,
+                timeout=CONF.telemetry_benchmark.evaluator_timeout,
+                page_size=CONF.telemetry_benchmark.page_size).run())
+        self.report("Alarm evaluator benchmark", results)
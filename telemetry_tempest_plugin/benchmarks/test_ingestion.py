@@ -0,0 +1,37 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from tempest import config
+from tempest.lib import decorators
+
+from telemetry_tempest_plugin.benchmarks import base
+from telemetry_tempest_plugin.benchmarks import ingestion
+
+CONF = config.CONF
+
+
+class IngestionBenchmarkTest(base.BaseGnocchiBenchmarkTest):
+
+    @decorators.idempotent_id('c8e2f7a1-3b6d-4d09-8e54-6f1a92b0d3c7')
+    def test_measures_ingestion_benchmark(self):
+        results = []
+        for count in CONF.telemetry_benchmark.ingestion_metric_counts:
+            results.extend(ingestion.IngestionBenchmark(
+                self.gnocchi_client, metric_count=count,
+                batch_sizes=CONF.telemetry_benchmark.ingestion_batch_sizes,
+                concurrencies=(
+                    CONF.telemetry_benchmark.ingestion_concurrencies),
+                points=CONF.telemetry_benchmark.ingestion_points,
+                sample=CONF.telemetry_benchmark.visibility_sample,
+                timeout=CONF.telemetry_benchmark.aggregation_timeout,
+                concurrency=CONF.telemetry_benchmark.concurrency).run())
+        self.report("Measures ingestion benchmark", results)
@@ -0,0 +1,34 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from tempest import config
+from tempest.lib import decorators
+
+from telemetry_tempest_plugin.benchmarks import base
+from telemetry_tempest_plugin.benchmarks import search
+
+CONF = config.CONF
+
+
+class SearchBenchmarkTest(base.BaseGnocchiBenchmarkTest):
+
+    @decorators.idempotent_id('e3a9c05d-2f71-4b86-a4d0-58c1b7e62f93')
+    def test_resource_search_benchmark(self):
+        results = []
+        for count in CONF.telemetry_benchmark.search_resource_counts:
+            results.extend(search.SearchBenchmark(
+                self.gnocchi_client, resource_count=count,
+                query_count=CONF.telemetry_benchmark.search_query_count,
+                page_size=CONF.telemetry_benchmark.page_size,
+                concurrency=CONF.telemetry_benchmark.concurrency,
+                batch_size=CONF.telemetry_benchmark.batch_size).run())
+        self.report("Resource search benchmark", results)
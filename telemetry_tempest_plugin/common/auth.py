@@ -0,0 +1,60 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from tempest.lib import auth
+
+
+class StaticAuthProvider(auth.AuthProvider):
+    """Authenticate requests with a fixed token, against a fixed endpoint.
+
+    This lets the clients of the plugin talk to a service without going
+    through Keystone, for example to a local stand-in of that service.
+    """
+
+    def __init__(self, endpoint, token='static-token'):
+        self.endpoint = endpoint.rstrip('/')
+        self.token = token
+        super(StaticAuthProvider, self).__init__(credentials=None)
+
+    @classmethod
+    def check_credentials(cls, credentials):
+        return True
+
+    def clear_auth(self):
+        # There are no credentials to reset
+        self.cache = None
+
+    def _get_auth(self):
+        return self.token, {}
+
+    def _fill_credentials(self, auth_data_body):
+        pass
+
+    def is_expired(self, auth_data):
+        return False
+
+    def base_url(self, filters, auth_data=None):
+        return auth.apply_url_filters(self.endpoint, filters)
+
+    def _decorate_request(self, filters, method, url, headers=None, body=None,
+                          auth_data=None):
+        if auth_data is None:
+            auth_data = self.get_auth()
+        token, _ = auth_data
+        headers = dict(headers or {})
+        headers['X-Auth-Token'] = token
+        base_url = self.base_url(filters=filters, auth_data=auth_data)
+        if url:
+            url = "/".join([base_url.rstrip('/'), url.lstrip('/')])
+        else:
+            url = base_url
+        return url, headers, body
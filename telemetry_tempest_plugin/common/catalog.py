@@ -0,0 +1,84 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Service catalog lookups for the scenario tests.
+
+The catalog of an auth provider is indexed once per token by service type,
+interface and region, so resolving the endpoints of a test does not walk the
+whole catalog for each of them. The index is rebuilt when the token changes.
+"""
+
+import threading
+import weakref
+
+from tempest import config
+from tempest.lib import exceptions
+
+_INDEXES = weakref.WeakKeyDictionary()
+_LOCK = threading.Lock()
+
+
+def _build_index(catalog):
+    index = {}
+    for service in catalog:
+        index.setdefault((service['type'], None, None), None)
+        for endpoint in service['endpoints']:
+            url = endpoint['url'].rstrip('/')
+            region = endpoint.get('region')
+            # The first endpoint of an interface is used when no region is
+            # asked for
+            for key in ((service['type'], endpoint['interface'], region),
+                        (service['type'], endpoint['interface'], None)):
+                index.setdefault(key, url)
+    return index
+
+
+def _get_index(auth_provider):
+    token, auth_data = auth_provider.get_auth()
+    with _LOCK:
+        cached = _INDEXES.get(auth_provider)
+        if cached is None or cached[0] != token:
+            cached = (token, _build_index(auth_data.get('catalog', [])))
+            _INDEXES[auth_provider] = cached
+    return cached[1]
+
+
+def get_endpoint(auth_provider, service, region=None):
+    """Return the URL of a service from the catalog of an auth provider.
+
+    :param auth_provider: the auth provider whose catalog is searched
+    :param service: the name of the configuration section of the service,
+                    which holds its catalog_type and endpoint_type options
+    :param region: the region of the endpoint, the first endpoint with the
+                   right interface is returned if None
+    :raises EndpointNotFound: if the service has no endpoint with the right
+                              interface, in the region if one is given
+    """
+    opt_section = getattr(config.CONF, service)
+    catalog_type = opt_section.catalog_type
+    endpoint_type = opt_section.endpoint_type
+    if endpoint_type.endswith("URL"):
+        endpoint_type = endpoint_type[:-3]
+    index = _get_index(auth_provider)
+    if (catalog_type, None, None) not in index:
+        raise exceptions.EndpointNotFound(
+            "%s endpoint not found" % catalog_type)
+    url = index.get((catalog_type, endpoint_type, region))
+    if url is None:
+        if region is not None:
+            raise exceptions.EndpointNotFound(
+                "%s interface not found for endpoint %s in region %s" %
+                (endpoint_type, catalog_type, region))
+        raise exceptions.EndpointNotFound(
+            "%s interface not found for endpoint %s" %
+            (endpoint_type, catalog_type))
+    return url
@@ -0,0 +1,95 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import urllib3
+
+
+class Response(dict):
+    """The response format tempest rest clients expect from http_obj."""
+
+    def __init__(self, info, url):
+        for key, value in info.getheaders().items():
+            self[str(key).lower()] = value
+        self.status = info.status
+        self['status'] = str(self.status)
+        self.reason = info.reason
+        self.version = info.version
+        self['content-location'] = url
+
+
+def _pool_kwargs(disable_ssl_certificate_validation, ca_certs, timeout):
+    kwargs = {}
+    if disable_ssl_certificate_validation:
+        urllib3.disable_warnings()
+        kwargs['cert_reqs'] = 'CERT_NONE'
+    elif ca_certs:
+        kwargs['cert_reqs'] = 'CERT_REQUIRED'
+        kwargs['ca_certs'] = ca_certs
+    if timeout:
+        kwargs['timeout'] = timeout
+    return kwargs
+
+
+class _KeepAliveMixin(object):
+
+    def request(self, url, method, *args, **kwargs):
+        if self.follow_redirects:
+            retry = urllib3.util.Retry(raise_on_redirect=False, redirect=5)
+        else:
+            retry = urllib3.util.Retry(redirect=False)
+        r = super(_KeepAliveMixin, self).request(method, url, retries=retry,
+                                                 *args, **kwargs)
+
+        if not kwargs.get('preload_content', True):
+            return r, b''
+        return Response(r, url), r.data
+
+
+class KeepAliveHttp(_KeepAliveMixin, urllib3.PoolManager):
+    """An http_obj for tempest rest clients reusing its connections.
+
+    tempest's ClosingHttp asks the server to close the connection after
+    each request and empties its pool, so every request pays for a new
+    TCP connection and TLS handshake. This keeps up to ``maxsize``
+    connections open per host instead.
+    """
+
+    def __init__(self, disable_ssl_certificate_validation=False,
+                 ca_certs=None, timeout=None, follow_redirects=True,
+                 maxsize=10):
+        self.follow_redirects = follow_redirects
+        super(KeepAliveHttp, self).__init__(
+            maxsize=maxsize, **_pool_kwargs(
+                disable_ssl_certificate_validation, ca_certs, timeout))
+
+
+class KeepAliveProxyHttp(_KeepAliveMixin, urllib3.ProxyManager):
+    """KeepAliveHttp going through an HTTP proxy, like ClosingProxyHttp."""
+
+    def __init__(self, proxy_url, disable_ssl_certificate_validation=False,
+                 ca_certs=None, timeout=None, follow_redirects=True,
+                 maxsize=10):
+        self.follow_redirects = follow_redirects
+        super(KeepAliveProxyHttp, self).__init__(
+            proxy_url, maxsize=maxsize, **_pool_kwargs(
+                disable_ssl_certificate_validation, ca_certs, timeout))
+
+
+def keepalive_http(proxy_url=None, **kwargs):
+    """Return a KeepAliveProxyHttp if proxy_url is set, else KeepAliveHttp.
+
+    This is the choice tempest's RestClient makes between ClosingProxyHttp
+    and ClosingHttp.
+    """
+    if proxy_url:
+        return KeepAliveProxyHttp(proxy_url, **kwargs)
+    return KeepAliveHttp(**kwargs)
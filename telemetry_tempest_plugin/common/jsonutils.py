@@ -0,0 +1,41 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""JSON encoding and decoding for the REST clients of the plugin.
+
+orjson is used when it is installed, the json module of the standard library
+otherwise. Both parse response bodies as bytes, without decoding them first,
+and dumps always returns UTF-8 encoded bytes, whichever is used.
+"""
+
+import json
+
+from oslo_utils import importutils
+
+orjson = importutils.try_import('orjson')
+
+
+def loads(body):
+    if orjson is not None:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # orjson rejects control characters in strings, which the json
+            # module accepts in non strict mode
+            pass
+    return json.loads(body, strict=False)
+
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
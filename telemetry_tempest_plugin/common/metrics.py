@@ -0,0 +1,305 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Request metrics of the REST clients of the plugin.
+
+Clients using RequestMetricsMixin record, for each request, its latency,
+the time spent waiting for the server, the size of the response and the
+number of times tempest retried it, in histograms of a Registry. Requests
+are grouped by service, endpoint and response status. The endpoint of a
+request is its method and path, with the UUIDs replaced by ``{id}``, like
+``GET /v2/alarms/{id}/history``.
+
+The registry of the process is enabled by [telemetry] client_metrics_file,
+which it is written to as JSON or as Prometheus text when the process
+exits, and by [telemetry] client_tracing, which opens an OpenTelemetry span
+for each request when the opentelemetry API is installed. Other tracing
+systems can be plugged in with Registry.add_span_hook.
+"""
+
+import atexit
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+from urllib import parse
+
+from oslo_log import log as logging
+from oslo_utils import importutils
+from oslo_utils import uuidutils
+from tempest import config
+
+otel_trace = importutils.try_import('opentelemetry.trace')
+
+CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0)
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(9))
+
+_REGISTRY = None
+_LOCK = threading.Lock()
+
+
+class Histogram(object):
+    """Counts of observed values, by upper bound."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        """Return (upper bound, count) pairs, the way Prometheus does."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def to_dict(self):
+        return {
+            'buckets': [[bound, count]
+                        for bound, count in self.cumulative_counts()],
+            'sum': self.sum,
+            'count': self.count,
+        }
+
+
+class RequestSeries(object):
+    """Metrics of the requests of one service, endpoint and status."""
+
+    def __init__(self):
+        self.duration = Histogram(LATENCY_BUCKETS)
+        self.http_duration = Histogram(LATENCY_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.retries = 0
+
+    def to_dict(self):
+        return {
+            'duration': self.duration.to_dict(),
+            'http_duration': self.http_duration.to_dict(),
+            'response_size': self.response_size.to_dict(),
+            'retries': self.retries,
+        }
+
+
+class Registry(object):
+    """Request metrics, by service, endpoint and response status."""
+
+    _PROMETHEUS_HISTOGRAMS = (
+        ('duration', 'telemetry_client_request_duration_seconds',
+         "Duration of the requests, from the client call to its return"),
+        ('http_duration', 'telemetry_client_http_duration_seconds',
+         "Time spent waiting for the responses of the server"),
+        ('response_size', 'telemetry_client_response_size_bytes',
+         "Size of the response bodies"),
+    )
+
+    def __init__(self):
+        self._series = {}
+        self._span_hooks = []
+        self._lock = threading.Lock()
+
+    def add_span_hook(self, hook):
+        """Call hook around each request.
+
+        :param hook: a callable taking the name of a request, like
+                     ``alarming GET /v2/alarms``, and a dict of attributes,
+                     and returning a context manager. The attributes hold
+                     the method and URL of the request when the context is
+                     entered, and its status, response size and retries too
+                     when it exits.
+        """
+        self._span_hooks.append(hook)
+
+    @contextlib.contextmanager
+    def span(self, name, attributes):
+        with contextlib.ExitStack() as stack:
+            for hook in self._span_hooks:
+                stack.enter_context(hook(name, attributes))
+            yield
+
+    def observe(self, service, endpoint, status, duration, http_duration,
+                response_size, retries=0):
+        key = (service, endpoint, str(status))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = RequestSeries()
+            series.duration.observe(duration)
+            series.http_duration.observe(http_duration)
+            series.response_size.observe(response_size)
+            series.retries += retries
+
+    def to_dict(self):
+        with self._lock:
+            return [dict(service=service, endpoint=endpoint, status=status,
+                         **series.to_dict())
+                    for (service, endpoint, status), series
+                    in sorted(self._series.items())]
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        series = self.to_dict()
+        lines = []
+        for attr, name, help_text in self._PROMETHEUS_HISTOGRAMS:
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s histogram' % name)
+            for s in series:
+                labels = _labels(s)
+                for bound, count in s[attr]['buckets']:
+                    lines.append('%s_bucket{%s,le="%s"} %d' % (
+                        name, labels, bound, count))
+                lines.append('%s_sum{%s} %r' % (name, labels, s[attr]['sum']))
+                lines.append('%s_count{%s} %d' % (
+                    name, labels, s[attr]['count']))
+        name = 'telemetry_client_retries_total'
+        lines.append('# HELP %s Requests retried by the client' % name)
+        lines.append('# TYPE %s counter' % name)
+        for s in series:
+            lines.append('%s{%s} %d' % (name, _labels(s), s['retries']))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write the metrics to a file, as Prometheus text for .prom files.
+
+        ``{pid}`` in path is replaced by the ID of the process, so that each
+        test worker writes its own file.
+        """
+        path = path.replace('{pid}', str(os.getpid()))
+        if path.endswith('.prom'):
+            data = self.to_prometheus()
+        else:
+            data = self.to_json()
+        with open(path, 'w') as f:
+            f.write(data)
+
+
+def _labels(series):
+    return ','.join('%s="%s"' % (label, series[label].replace('"', '\\"'))
+                    for label in ('service', 'endpoint', 'status'))
+
+
+@contextlib.contextmanager
+def opentelemetry_span_hook(name, attributes):
+    """A span hook opening an OpenTelemetry span for each request."""
+    tracer = otel_trace.get_tracer(__name__)
+    with tracer.start_as_current_span(name, kind=otel_trace.SpanKind.CLIENT,
+                                      attributes=attributes) as span:
+        try:
+            yield
+        finally:
+            span.set_attributes(attributes)
+
+
+def endpoint_name(method, url):
+    path = parse.urlsplit(url).path.strip('/')
+    segments = ['{id}' if uuidutils.is_uuid_like(segment) else segment
+                for segment in path.split('/')]
+    return '%s /%s' % (method, '/'.join(segments))
+
+
+def get_registry():
+    """Return the registry of the process, or None if it is disabled."""
+    global _REGISTRY
+
+    path = CONF.telemetry.client_metrics_file
+    tracing = CONF.telemetry.client_tracing
+    if not path and not tracing:
+        return None
+    with _LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = Registry()
+            if tracing:
+                if otel_trace is None:
+                    LOG.warning("client_tracing is enabled but the "
+                                "opentelemetry API is not installed")
+                else:
+                    _REGISTRY.add_span_hook(opentelemetry_span_hook)
+            if path:
+                atexit.register(_REGISTRY.write, path)
+    return _REGISTRY
+
+
+class RequestMetricsMixin(object):
+    """Record the requests of a tempest RestClient in a Registry.
+
+    The class using it must set the ``metrics`` attribute to a Registry, or
+    to None to disable the metrics.
+    """
+
+    metrics = None
+    _calls = threading.local()
+
+    def raw_request(self, url, method, *args, **kwargs):
+        start = time.monotonic()
+        try:
+            return super(RequestMetricsMixin, self).raw_request(
+                url, method, *args, **kwargs)
+        finally:
+            calls = self._calls
+            calls.attempts = getattr(calls, 'attempts', 0) + 1
+            calls.http_duration = (getattr(calls, 'http_duration', 0.0)
+                                   + time.monotonic() - start)
+
+    def request(self, method, url, *args, **kwargs):
+        if self.metrics is None:
+            return super(RequestMetricsMixin, self).request(
+                method, url, *args, **kwargs)
+
+        endpoint = endpoint_name(method, url)
+        attributes = {'http.method': method, 'http.url': url}
+        calls = self._calls
+        calls.attempts = 0
+        calls.http_duration = 0.0
+        status = 'error'
+        response_size = 0
+        start = time.monotonic()
+        with self.metrics.span('%s %s' % (self.service, endpoint),
+                               attributes):
+            try:
+                resp, body = super(RequestMetricsMixin, self).request(
+                    method, url, *args, **kwargs)
+                status = resp.status
+                response_size = len(body or b'')
+                return resp, body
+            except Exception as e:
+                resp = getattr(e, 'resp', None)
+                if resp is not None:
+                    status = resp.status
+                body = getattr(e, 'resp_body', None)
+                if isinstance(body, (bytes, str)):
+                    response_size = len(body)
+                raise
+            finally:
+                duration = time.monotonic() - start
+                retries = max(calls.attempts - 1, 0)
+                attributes.update({'http.status_code': str(status),
+                                   'http.response_size': response_size,
+                                   'retries': retries})
+                self.metrics.observe(self.service, endpoint, status,
+                                     duration, calls.http_duration,
+                                     response_size, retries)
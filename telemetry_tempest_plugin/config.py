@@ -51,6 +51,9 @@ alarming_group = cfg.OptGroup(name='alarming_plugin',
 metric_group = cfg.OptGroup(name='metric',
                             title='Metric Service Options')
 
+benchmark_group = cfg.OptGroup(name='telemetry_benchmark',
+                               title='Telemetry Benchmark Options')
+
 telemetry_opts = [
     cfg.IntOpt('notification_wait',
                default=120,
@@ -80,6 +83,95 @@ telemetry_opts = [
                 default=False,
                 help="Disable SSL certificate validation when running "
                      "scenario tests"),
+    cfg.IntOpt('scenario_concurrency',
+               default=1,
+               min=1,
+               help="Number of gabbi YAML files of a scenario test class to "
+                    "run at the same time. When greater than 1, the YAML "
+                    "files of each class are run by a single "
+                    "test_concurrent_gabbits test using a thread pool, "
+                    "instead of one test per file. This changes the test "
+                    "IDs, so test regexes, skip lists and test history "
+                    "based on the per-file test names no longer match. The "
+                    "YAML files of a class must then not depend on each "
+                    "other."),
+    cfg.StrOpt('gabbi_cache_dir',
+               help="Directory where parsed gabbi YAML files are cached, "
+                    "keyed by the checksum of their content, so that "
+                    "subsequent runs do not parse them again. Cache files "
+                    "are pickles: the directory must only be writable by "
+                    "trusted users. Parsed files are only cached in memory "
+                    "if unset."),
+    cfg.StrOpt('image_cache',
+               default='none',
+               choices=[
+                   ('none', 'Upload the image for each test and delete it '
+                            'at the end of the test'),
+                   ('run', 'Upload the image once per test process and '
+                           'delete it when the process exits'),
+                   ('persistent', 'Reuse the image uploaded by a previous '
+                                  'run, and never delete it')
+               ],
+               help="How the scenario tests share the image of "
+                    "[scenario] img_file. Shared images are uploaded as "
+                    "community images with the configured admin "
+                    "credentials."),
+    cfg.DictOpt('gabbi_intercepts',
+                default={},
+                help="WSGI app factories the requests of the gabbi scenario "
+                     "tests are sent to instead of the network, by service. "
+                     "Keys are the names of the configuration sections of "
+                     "the services, such as metric or alarming_plugin, and "
+                     "values the import paths of the factories. A test "
+                     "file is only intercepted if all the services it "
+                     "talks to are."),
+    cfg.IntOpt('network_pool_size',
+               default=0,
+               min=0,
+               help="Number of shared networks each test process creates "
+                    "with the configured admin credentials when its first "
+                    "scenario test class starts, and lends to its scenario "
+                    "test classes instead of having each of them create its "
+                    "own network. The networks are deleted when the process "
+                    "exits. Disabled if 0."),
+    cfg.BoolOpt('async_stack_cleanup',
+                default=False,
+                help="Delete the Heat stack, the network and the "
+                     "credentials of the integration scenario test classes "
+                     "in the background, and only wait for them when the "
+                     "test process exits, instead of at the end of each "
+                     "class."),
+    cfg.IntOpt('stack_delete_timeout',
+               default=60,
+               min=0,
+               help="The seconds to wait for the deletion of a Heat stack of "
+                    "the integration scenario tests."),
+    cfg.Opt('autoscaling_slos',
+            type=types.Dict(value_type=types.Float(min=0)),
+            default={},
+            help="Maximum seconds each stage of the autoscaling scenarios "
+                 "may take, by stage. The stages are sample_visible, from "
+                 "the boot of the first server to its first CPU sample "
+                 "being queryable, alarm, from that sample to the "
+                 "transition of the scale up alarm, scale_out, from that "
+                 "transition to the second server being active, and "
+                 "scale_in, from the end of the CPU load to the stack being "
+                 "back to one server. The latencies of the stages are "
+                 "always reported, and only checked when listed here."),
+    cfg.StrOpt('client_metrics_file',
+               help="File the latency, response size and retries of the "
+                    "requests of the alarming and metric clients are written "
+                    "to when the test process exits, by endpoint and response "
+                    "status. It is written as Prometheus text if its name "
+                    "ends with .prom, as JSON otherwise. {pid} is replaced "
+                    "by the ID of the process, so that each test worker "
+                    "writes its own file. Disabled if unset."),
+    cfg.BoolOpt('client_tracing',
+                default=False,
+                help="Open an OpenTelemetry span for each request of the "
+                     "alarming and metric clients. Requires the "
+                     "opentelemetry API, and an SDK configured to export the "
+                     "spans."),
     cfg.URIOpt('sg_core_service_url',
                default="http://127.0.0.1:3000",
                help="URL to sg-core prometheus endpoint"),
@@ -132,6 +224,22 @@ alarming_opts = [
     cfg.BoolOpt('create_alarms',
                 default=True,
                 help="If create alarms dynamically before testing."),
+    cfg.BoolOpt('http_keepalive',
+                default=False,
+                help="Keep the connections to the alarming service open "
+                     "between requests, instead of opening a new one for "
+                     "each request."),
+    cfg.IntOpt('http_pool_size',
+               default=10,
+               min=1,
+               help="Maximum number of connections kept open to the "
+                    "alarming service when http_keepalive is enabled."),
+    cfg.IntOpt('bulk_concurrency',
+               default=10,
+               min=1,
+               help="Maximum number of requests sent at the same time to "
+                    "the alarming service when creating or deleting alarms "
+                    "in bulk."),
 ]
 
 metric_opts = [
@@ -143,4 +251,119 @@ metric_opts = [
                choices=['public', 'admin', 'internal',
                         'publicURL', 'adminURL', 'internalURL'],
                help="The endpoint type to use for the metric service."),
+    cfg.BoolOpt('http_keepalive',
+                default=False,
+                help="Keep the connections to the metric service open "
+                     "between requests, instead of opening a new one for "
+                     "each request."),
+    cfg.IntOpt('http_pool_size',
+               default=10,
+               min=1,
+               help="Maximum number of connections kept open to the "
+                    "metric service when http_keepalive is enabled."),
+]
+
+benchmark_opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help="Whether to run the telemetry benchmarks. They create "
+                     "a lot of resources and take a long time, so they are "
+                     "disabled by default."),
+    cfg.IntOpt('concurrency',
+               default=10,
+               min=1,
+               help="Number of requests the benchmarks keep in flight."),
+    cfg.ListOpt('alarm_counts',
+                default=[1000],
+                item_type=types.Integer(min=1),
+                help="Numbers of alarms the alarming API benchmark is run "
+                     "with, one run per number."),
+    cfg.IntOpt('page_size',
+               default=100,
+               min=1,
+               help="Number of items per page when the benchmarks list "
+                    "resources page by page."),
+    cfg.IntOpt('query_count',
+               default=100,
+               min=1,
+               help="Number of filtered listings done by the benchmarks."),
+    cfg.ListOpt('evaluator_alarm_counts',
+                default=[100],
+                item_type=types.Integer(min=1),
+                help="Numbers of Gnocchi threshold alarms the alarm "
+                     "evaluator benchmark is run with, one run per number."),
+    cfg.IntOpt('evaluator_timeout',
+               default=900,
+               min=1,
+               help="The seconds the alarm evaluator benchmark waits for "
+                    "all the alarms of a run to transition."),
+    cfg.IntOpt('measure_push_interval',
+               default=10,
+               min=1,
+               help="The seconds between two rounds of measures sent to the "
+                    "metrics of the benchmarks which wait for the alarm "
+                    "evaluator."),
+    cfg.IntOpt('batch_size',
+               default=100,
+               min=1,
+               help="Number of resources or metrics whose measures are sent "
+                    "in a single batch request by the benchmarks."),
+    cfg.ListOpt('ingestion_metric_counts',
+                default=[1000],
+                item_type=types.Integer(min=1),
+                help="Numbers of metrics the measures ingestion benchmark "
+                     "is run with, one sweep per number."),
+    cfg.ListOpt('ingestion_batch_sizes',
+                default=[10, 100, 1000],
+                item_type=types.Integer(min=1),
+                help="Numbers of metrics per batch request swept by the "
+                     "measures ingestion benchmark."),
+    cfg.ListOpt('ingestion_concurrencies',
+                default=[1, 10],
+                item_type=types.Integer(min=1),
+                help="Numbers of batch requests in flight swept by the "
+                     "measures ingestion benchmark."),
+    cfg.IntOpt('ingestion_points',
+               default=10,
+               min=1,
+               max=60,
+               help="Number of measures sent to each metric by each run of "
+                    "the measures ingestion benchmark."),
+    cfg.IntOpt('visibility_sample',
+               default=10,
+               min=1,
+               help="Number of metrics the measures ingestion benchmark "
+                    "checks the aggregation of, for each of the refresh "
+                    "and metricd paths."),
+    cfg.IntOpt('aggregation_timeout',
+               default=300,
+               min=1,
+               help="The seconds the benchmarks wait for metricd to "
+                    "aggregate the measures they sent."),
+    cfg.ListOpt('aggregates_metric_counts',
+                default=[10, 100],
+                item_type=types.Integer(min=1),
+                help="Numbers of metrics the aggregates benchmark is run "
+                     "with."),
+    cfg.ListOpt('aggregates_timespans',
+                default=[3600, 86400],
+                item_type=types.Integer(min=60, max=604800),
+                help="Lengths in seconds of the series the aggregates "
+                     "benchmark is run with, one measure per minute. Each "
+                     "metric count is run with each timespan."),
+    cfg.IntOpt('aggregates_query_count',
+               default=20,
+               min=1,
+               help="Number of requests of each read path and granularity "
+                    "sent by the aggregates benchmark."),
+    cfg.ListOpt('search_resource_counts',
+                default=[10000],
+                item_type=types.Integer(min=1),
+                help="Numbers of resources the resource search benchmark "
+                     "is run with, one run per number."),
+    cfg.IntOpt('search_query_count',
+               default=10,
+               min=1,
+               help="Number of walks through the results of each search "
+                    "done by the resource search benchmark."),
 ]
@@ -152,6 +152,17 @@ class InvalidStructure(TempestException):
     message = "Invalid structure of table with details"
 
 
+class BulkOperationError(TempestException):
+    message = "%(failed)d out of %(total)d requests failed"
+
+    def __init__(self, results, errors):
+        super(BulkOperationError, self).__init__(
+            *errors, failed=len(errors), total=len(results))
+        # The result of each request, None for those which failed
+        self.results = results
+        self.errors = errors
+
+
 class CommandFailed(Exception):
     def __init__(self, returncode, cmd, output, stderr):
         super(CommandFailed, self).__init__()
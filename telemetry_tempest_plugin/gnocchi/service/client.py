@@ -0,0 +1,422 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from urllib import parse
+
+from tempest.lib.common import rest_client
+
+from telemetry_tempest_plugin.common import http
+from telemetry_tempest_plugin.common import jsonutils
+from telemetry_tempest_plugin.common import metrics
+
+JSON_PATCH_HEADERS = {'Content-Type': 'application/json-patch+json',
+                      'Accept': 'application/json'}
+
+
+class GnocchiClient(metrics.RequestMetricsMixin, rest_client.RestClient):
+
+    version = '1'
+    uri_prefix = "v1"
+
+    def __init__(self, auth_provider, service, region, keepalive=False,
+                 pool_size=10, metrics=None, **kwargs):
+        super(GnocchiClient, self).__init__(auth_provider, service, region,
+                                            **kwargs)
+        self.metrics = metrics
+        if keepalive:
+            self.http_obj = http.keepalive_http(
+                proxy_url=kwargs.get('proxy_url'),
+                disable_ssl_certificate_validation=self.dscv,
+                ca_certs=kwargs.get('ca_certs'),
+                timeout=kwargs.get('http_timeout'),
+                follow_redirects=kwargs.get('follow_redirects', True),
+                maxsize=pool_size)
+
+    def deserialize(self, body):
+        return jsonutils.loads(body)
+
+    def serialize(self, body):
+        return jsonutils.dumps(body)
+
+    def _stream_list(self, items, chunk_size):
+        """Encode an iterable as a JSON list, chunk_size items at a time."""
+        yield b'['
+        separator = b''
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield separator + self.serialize(chunk)[1:-1]
+                separator = b','
+                chunk = []
+        if chunk:
+            yield separator + self.serialize(chunk)[1:-1]
+        yield b']'
+
+    def _stream_dict(self, pairs, chunk_size):
+        """Encode (key, iterable) pairs as a JSON object of lists."""
+        yield b'{'
+        separator = b''
+        for key, items in pairs:
+            yield separator + self.serialize(key) + b':'
+            yield from self._stream_list(items, chunk_size)
+            separator = b','
+        yield b'}'
+
+    @staticmethod
+    def _paginated_uri(uri, sort=None, limit=None, marker=None, **params):
+        if sort:
+            params['sort'] = sort
+        if limit is not None:
+            params['limit'] = int(limit)
+        if marker:
+            params['marker'] = marker
+        if params:
+            uri += "?%s" % parse.urlencode(params, doseq=True)
+        return uri
+
+    @staticmethod
+    def _iterate(list_page, page_size, *args, **kwargs):
+        """Iterate over the items of a listing, page_size at a time.
+
+        Each page is only requested once the iteration reaches it, using
+        the limit and marker parameters of list_page.
+        """
+        marker = None
+        while True:
+            page = list_page(*args, limit=page_size, marker=marker,
+                             **kwargs)
+            yield from page
+            if len(page) < page_size:
+                return
+            marker = page[-1]['id']
+
+    # Archive policies
+
+    def create_archive_policy(self, **kwargs):
+        uri = "%s/archive_policy" % self.uri_prefix
+        body = self.serialize(kwargs)
+        resp, body = self.post(uri, body)
+        self.expected_success(201, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBody(resp, body)
+
+    def list_archive_policies(self):
+        uri = "%s/archive_policy" % self.uri_prefix
+        resp, body = self.get(uri)
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBodyList(resp, body)
+
+    def show_archive_policy(self, name):
+        uri = "%s/archive_policy/%s" % (self.uri_prefix, name)
+        resp, body = self.get(uri)
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBody(resp, body)
+
+    def update_archive_policy(self, name, definition):
+        uri = "%s/archive_policy/%s" % (self.uri_prefix, name)
+        body = self.serialize({'definition': definition})
+        resp, body = self.patch(uri, body)
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBody(resp, body)
+
+    def delete_archive_policy(self, name):
+        uri = "%s/archive_policy/%s" % (self.uri_prefix, name)
+        resp, body = self.delete(uri)
+        self.expected_success(204, resp.status)
+        return rest_client.ResponseBody(resp, body)
+
+    # Resource types
+
+    def create_resource_type(self, **kwargs):
+        uri = "%s/resource_type" % self.uri_prefix
+        body = self.serialize(kwargs)
+        resp, body = self.post(uri, body)
+        self.expected_success(201, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBody(resp, body)
+
+    def list_resource_types(self):
+        uri = "%s/resource_type" % self.uri_prefix
+        resp, body = self.get(uri)
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBodyList(resp, body)
+
+    def show_resource_type(self, name):
+        uri = "%s/resource_type/%s" % (self.uri_prefix, name)
+        resp, body = self.get(uri)
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBody(resp, body)
+
+    def update_resource_type(self, name, operations):
+        """Add or remove attributes of a resource type.
+
+        :param operations: a JSON patch, like [{"op": "add", "path":
+                           "/attributes/<name>", "value": {...}}]
+        """
+        uri = "%s/resource_type/%s" % (self.uri_prefix, name)
+        body = self.serialize(operations)
+        resp, body = self.patch(uri, body, headers=JSON_PATCH_HEADERS)
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBody(resp, body)
+
+    def delete_resource_type(self, name):
+        uri = "%s/resource_type/%s" % (self.uri_prefix, name)
+        resp, body = self.delete(uri)
+        self.expected_success(204, resp.status)
+        return rest_client.ResponseBody(resp, body)
+
+    # Resources
+
+    def create_resource(self, resource_type, **kwargs):
+        uri = "%s/resource/%s" % (self.uri_prefix, resource_type)
+        body = self.serialize(kwargs)
+        resp, body = self.post(uri, body)
+        self.expected_success(201, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBody(resp, body)
+
+    def list_resources(self, resource_type='generic', sort=None, limit=None,
+                       marker=None):
+        uri = self._paginated_uri(
+            "%s/resource/%s" % (self.uri_prefix, resource_type),
+            sort, limit, marker)
+        resp, body = self.get(uri)
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBodyList(resp, body)
+
+    def iter_resources(self, resource_type='generic', sort=None,
+                       page_size=100):
+        """Iterate over the resources of a type, page_size at a time."""
+        return self._iterate(self.list_resources, page_size, resource_type,
+                             sort=sort)
+
+    def show_resource(self, resource_type, resource_id):
+        uri = "%s/resource/%s/%s" % (self.uri_prefix, resource_type,
+                                     resource_id)
+        resp, body = self.get(uri)
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBody(resp, body)
+
+    def update_resource(self, resource_type, resource_id, **kwargs):
+        uri = "%s/resource/%s/%s" % (self.uri_prefix, resource_type,
+                                     resource_id)
+        body = self.serialize(kwargs)
+        resp, body = self.patch(uri, body)
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBody(resp, body)
+
+    def delete_resource(self, resource_type, resource_id):
+        uri = "%s/resource/%s/%s" % (self.uri_prefix, resource_type,
+                                     resource_id)
+        resp, body = self.delete(uri)
+        self.expected_success(204, resp.status)
+        return rest_client.ResponseBody(resp, body)
+
+    def delete_resources(self, resource_type, query):
+        """Delete all the resources of a type matching a search query.
+
+        :param query: a Gnocchi search filter, like {"in": {"id": [...]}}
+        """
+        uri = "%s/resource/%s" % (self.uri_prefix, resource_type)
+        resp, body = self.delete(uri, body=self.serialize(query))
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBody(resp, body)
+
+    def search_resources(self, resource_type, query, sort=None, limit=None,
+                         marker=None):
+        """Search resources
+
+        :param query: a Gnocchi search filter, like {"=": {"user_id": ...}}
+        :param sort: a "key:direction" string, or a list of them.
+        """
+        uri = self._paginated_uri(
+            "%s/search/resource/%s" % (self.uri_prefix, resource_type),
+            sort, limit, marker)
+        resp, body = self.post(uri, self.serialize(query))
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBodyList(resp, body)
+
+    def iter_search_resources(self, resource_type, query, sort=None,
+                              page_size=100):
+        """Iterate over the resources matching a search query."""
+        return self._iterate(self.search_resources, page_size,
+                             resource_type, query, sort=sort)
+
+    # Metrics
+
+    def create_metric(self, **kwargs):
+        uri = "%s/metric" % self.uri_prefix
+        body = self.serialize(kwargs)
+        resp, body = self.post(uri, body)
+        self.expected_success(201, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBody(resp, body)
+
+    def list_metrics(self, sort=None, limit=None, marker=None, **filters):
+        """List metrics
+
+        :param filters: attributes the metrics must have, like name or
+                        resource_id.
+        """
+        uri = self._paginated_uri("%s/metric" % self.uri_prefix,
+                                  sort, limit, marker, **filters)
+        resp, body = self.get(uri)
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBodyList(resp, body)
+
+    def iter_metrics(self, sort=None, page_size=100, **filters):
+        """Iterate over the metrics, page_size at a time."""
+        return self._iterate(self.list_metrics, page_size, sort=sort,
+                             **filters)
+
+    def show_metric(self, metric_id):
+        uri = "%s/metric/%s" % (self.uri_prefix, metric_id)
+        resp, body = self.get(uri)
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBody(resp, body)
+
+    def delete_metric(self, metric_id):
+        uri = "%s/metric/%s" % (self.uri_prefix, metric_id)
+        resp, body = self.delete(uri)
+        self.expected_success(204, resp.status)
+        return rest_client.ResponseBody(resp, body)
+
+    # Measures
+
+    def add_measures(self, metric_id, measures):
+        """Add measures to a metric.
+
+        :param measures: a list of {"timestamp": ..., "value": ...}.
+        """
+        uri = "%s/metric/%s/measures" % (self.uri_prefix, metric_id)
+        resp, body = self.post(uri, self.serialize(measures))
+        self.expected_success(202, resp.status)
+        return rest_client.ResponseBody(resp, body)
+
+    def stream_measures(self, metric_id, measures, chunk_size=1000):
+        """Add measures to a metric, streaming them in the request body.
+
+        :param measures: an iterable of {"timestamp": ..., "value": ...},
+                         like a generator. It is only consumed while the
+                         request is sent, chunk_size measures at a time, so
+                         it never has to fit in memory. As it can only be
+                         consumed once, the request cannot be retried on a
+                         413 response.
+        """
+        uri = "%s/metric/%s/measures" % (self.uri_prefix, metric_id)
+        resp, body = self.post(uri, self._stream_list(measures, chunk_size),
+                               chunked=True)
+        self.expected_success(202, resp.status)
+        return rest_client.ResponseBody(resp, body)
+
+    def add_resources_measures(self, measures, create_metrics=False):
+        """Add measures to the metrics of several resources in one request.
+
+        :param measures: a dict mapping resource IDs to dicts mapping metric
+                         names to lists of {"timestamp": ..., "value": ...}.
+        :param create_metrics: create the metrics which do not exist yet,
+                               with the default archive policy.
+        """
+        uri = "%s/batch/resources/metrics/measures" % self.uri_prefix
+        if create_metrics:
+            uri += "?create_metrics=true"
+        resp, body = self.post(uri, self.serialize(measures))
+        self.expected_success(202, resp.status)
+        return rest_client.ResponseBody(resp, body)
+
+    def add_metrics_measures(self, measures):
+        """Add measures to several metrics in one request.
+
+        :param measures: a dict mapping metric IDs to lists of
+                         {"timestamp": ..., "value": ...}.
+        """
+        uri = "%s/batch/metrics/measures" % self.uri_prefix
+        resp, body = self.post(uri, self.serialize(measures))
+        self.expected_success(202, resp.status)
+        return rest_client.ResponseBody(resp, body)
+
+    def stream_metrics_measures(self, measures, chunk_size=1000):
+        """Add measures to several metrics, streaming them in one request.
+
+        :param measures: an iterable of (metric ID, measures) pairs, the
+                         measures being an iterable of {"timestamp": ...,
+                         "value": ...}. Both are only consumed while the
+                         request is sent, as with stream_measures.
+        """
+        uri = "%s/batch/metrics/measures" % self.uri_prefix
+        resp, body = self.post(uri, self._stream_dict(measures, chunk_size),
+                               chunked=True)
+        self.expected_success(202, resp.status)
+        return rest_client.ResponseBody(resp, body)
+
+    def show_measures(self, metric_id, refresh=False, **params):
+        """Get the aggregated measures of a metric.
+
+        :param refresh: aggregate the measures not processed by metricd yet
+                        before answering.
+        :param params: the other query parameters, like granularity,
+                       aggregation, start or stop.
+        """
+        uri = "%s/metric/%s/measures" % (self.uri_prefix, metric_id)
+        if refresh:
+            params['refresh'] = 'true'
+        if params:
+            uri += "?%s" % parse.urlencode(params)
+        resp, body = self.get(uri)
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        return rest_client.ResponseBodyList(resp, body)
+
+    def aggregates(self, operations, resource_type=None, search=None,
+                   groupby=None, **params):
+        """Compute aggregates across metrics.
+
+        :param operations: the operations to compute, like
+                           "(aggregate mean (metric (<id> mean) ...))".
+        :param resource_type: the type of the resources searched.
+        :param search: a search filter on resources, to compute the
+                       operations on the metrics of the matching resources,
+                       designated by name in the operations.
+        :param groupby: resource attributes to group the matching resources
+                        by, with search only.
+        :param params: the other query parameters, like granularity, start,
+                       stop or needed_overlap.
+        """
+        uri = "%s/aggregates" % self.uri_prefix
+        body = {'operations': operations}
+        if search is not None:
+            body['resource_type'] = resource_type or 'generic'
+            body['search'] = search
+        if groupby:
+            params['groupby'] = groupby
+        if params:
+            uri += "?%s" % parse.urlencode(params, doseq=True)
+        resp, body = self.post(uri, self.serialize(body))
+        self.expected_success(200, resp.status)
+        body = self.deserialize(body)
+        if isinstance(body, list):
+            return rest_client.ResponseBodyList(resp, body)
+        return rest_client.ResponseBody(resp, body)
@@ -46,6 +46,9 @@ class TelemetryTempestPlugin(plugins.TempestPlugin):
         config.register_opt_group(
             conf, tempest_config.metric_group,
             tempest_config.metric_opts)
+        config.register_opt_group(
+            conf, tempest_config.benchmark_group,
+            tempest_config.benchmark_opts)
 
     def get_opt_lists(self):
         return [(tempest_config.telemetry_group.name,
@@ -57,4 +60,6 @@ class TelemetryTempestPlugin(plugins.TempestPlugin):
                 (tempest_config.alarming_group.name,
                  tempest_config.alarming_opts),
                 (tempest_config.metric_group.name,
-                 tempest_config.metric_opts)]
+                 tempest_config.metric_opts),
+                (tempest_config.benchmark_group.name,
+                 tempest_config.benchmark_opts)]
@@ -0,0 +1,122 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Glance images shared by the tests of the scenario test classes.
+
+Uploading CONF.scenario.img_file for each test is often the slowest step of
+the test setup. With [telemetry] image_cache set to "run" or "persistent",
+the image is uploaded once with the configured admin credentials, as a
+community image all the test projects can boot, and is then reused by all the
+tests of the process. Images are identified by the checksum of the image file
+and by their formats, so a changed image file is uploaded again.
+"""
+
+import atexit
+import hashlib
+import os
+import tarfile
+import threading
+
+from oslo_log import log as logging
+from tempest import clients
+from tempest.common import credentials_factory
+from tempest.common import waiters
+from tempest import config
+from tempest.lib import exceptions as lib_exc
+
+CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+_IMAGES = {}
+_LOCK = threading.Lock()
+
+
+def _image_key(path, params):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as image_file:
+        for chunk in iter(lambda: image_file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    for name in sorted(params):
+        digest.update(('%s=%s' % (name, params[name])).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _image_client():
+    creds = credentials_factory.get_configured_admin_credentials()
+    return clients.Manager(creds).image_client_v2
+
+
+def _find_image(client, name):
+    images = client.list_images(name=name, status='active',
+                                visibility='community')['images']
+    return images[0]['id'] if images else None
+
+
+def _upload_image(client, name, path, params):
+    image = client.create_image(name=name, visibility='community', **params)
+    image = image['image'] if 'image' in image else image
+    try:
+        with open(path, 'rb') as image_file:
+            client.store_image_file(image['id'], image_file)
+        waiters.wait_for_image_status(client, image['id'], 'active')
+    except Exception:
+        _delete_image(client, image['id'])
+        raise
+    LOG.debug("Uploaded shared image %s (%s)", name, image['id'])
+    return image['id']
+
+
+def _delete_image(client, image_id):
+    try:
+        client.delete_image(image_id)
+    except lib_exc.NotFound:
+        pass
+
+
+def get_image(test):
+    """Return the id of an image of CONF.scenario.img_file for a test.
+
+    The image is created by test.image_create() and deleted at the end of the
+    test if [telemetry] image_cache is "none", or if the image file is a
+    tarball of split kernel and ramdisk images, which are not shared.
+    """
+    mode = CONF.telemetry.image_cache
+    path = CONF.scenario.img_file
+    if mode == 'none' or tarfile.is_tarfile(path):
+        return test.image_create()
+
+    params = {
+        'container_format': CONF.scenario.img_container_format,
+        'disk_format': (CONF.scenario.img_disk_format
+                        or CONF.scenario.img_container_format),
+    }
+    params.update(CONF.scenario.img_properties or {})
+    stat = os.stat(path)
+    cache_key = (path, stat.st_mtime_ns, stat.st_size,
+                 tuple(sorted(params.items())))
+    with _LOCK:
+        image_id = _IMAGES.get(cache_key)
+        if image_id is not None:
+            return image_id
+
+        key = _image_key(path, params)
+        client = _image_client()
+        name = '%s-telemetry-image-%s' % (CONF.resource_name_prefix,
+                                          key[:16])
+        if mode == 'persistent':
+            image_id = _find_image(client, name)
+        if image_id is None:
+            image_id = _upload_image(client, name, path, params)
+            if mode == 'run':
+                atexit.register(_delete_image, client, image_id)
+        _IMAGES[cache_key] = image_id
+    return image_id
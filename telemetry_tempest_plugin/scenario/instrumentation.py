@@ -0,0 +1,185 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Timing of the steps of gabbi scenario tests.
+
+Each step of a YAML file records when it started and finished, its wall
+time, which includes the waits between poll attempts, the number of HTTP
+requests it sent, their latency, the bytes sent and received and the status
+of its last response. run_test attaches them to the tempest test, as a text
+table and as JSON, so they end up in the subunit stream of the run.
+
+The parsed body of the last response of each step is kept too, but not
+reported, for the scenario classes to analyse the run.
+"""
+
+import json
+import time
+import unittest
+
+from testtools import content
+
+
+class StepMetrics(object):
+    """Metrics of one step of a gabbi YAML file."""
+
+    def __init__(self, name):
+        self.name = name
+        self.outcome = None
+        self.started_at = None
+        self.finished_at = None
+        self.wall_time = None
+        self.requests = 0
+        self.http_time = 0.0
+        self.max_latency = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.status = None
+        self.response = None
+
+    def add_request(self, latency, bytes_sent, bytes_received=0,
+                    status=None):
+        self.requests += 1
+        self.http_time += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+        self.status = status
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'outcome': self.outcome,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'wall_time': self.wall_time,
+            'requests': self.requests,
+            'http_time': self.http_time,
+            'max_latency': self.max_latency,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'status': self.status,
+        }
+
+
+class SuiteMetrics(object):
+    """Metrics of the steps of a gabbi YAML file, in the order of the file.
+
+    Steps which did not run, because they were skipped or an earlier step
+    failed, are left out.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._steps = []
+
+    def add_step(self, name):
+        step = StepMetrics(name)
+        self._steps.append(step)
+        return step
+
+    def get_step(self, name):
+        """Return the metrics of a step which ran, or None."""
+        for step in self.steps:
+            if step.name == name:
+                return step
+        return None
+
+    @property
+    def steps(self):
+        return [step for step in self._steps if step.outcome is not None]
+
+    def to_dict(self):
+        steps = self.steps
+        return {
+            'filename': self.filename,
+            'wall_time': sum(step.wall_time for step in steps),
+            'requests': sum(step.requests for step in steps),
+            'steps': [step.to_dict() for step in steps],
+        }
+
+    def format_report(self):
+        """Format the steps as a text table, times in ms."""
+        lines = ['%-48s %8s %8s %9s %9s %9s %9s %6s' % (
+            'step', 'outcome', 'requests', 'wall', 'http', 'max',
+            'received', 'status')]
+        for step in self.steps:
+            lines.append('%-48s %8s %8d %9.1f %9.1f %9.1f %9d %6s' % (
+                step.name[:48], step.outcome, step.requests,
+                step.wall_time * 1000, step.http_time * 1000,
+                step.max_latency * 1000, step.bytes_received,
+                step.status or '-'))
+        return '\n'.join(lines)
+
+
+def _instrument_test(test_class, step):
+    run_test = test_class._run_test
+    http_request = test_class.http.request
+
+    def _run_test(self):
+        step.started_at = time.time()
+        start = time.monotonic()
+        step.outcome = 'error'
+        try:
+            result = run_test(self)
+        except AssertionError:
+            step.outcome = 'failure'
+            raise
+        except unittest.SkipTest:
+            step.outcome = 'skip'
+            raise
+        finally:
+            step.wall_time = time.monotonic() - start
+            step.finished_at = step.started_at + step.wall_time
+            step.response = getattr(self, 'response_data', None)
+        step.outcome = 'success'
+        return result
+
+    def request(absolute_uri, method, body, *args, **kwargs):
+        start = time.monotonic()
+        bytes_sent = len(body or b'')
+        try:
+            headers, body = http_request(absolute_uri, method, body,
+                                         *args, **kwargs)
+        except Exception:
+            step.add_request(time.monotonic() - start, bytes_sent)
+            raise
+        step.add_request(time.monotonic() - start, bytes_sent, len(body),
+                         headers.get('status'))
+        return headers, body
+
+    test_class._run_test = _run_test
+    test_class.http.request = request
+
+
+def instrument(test_suite, filename):
+    """Record the metrics of the steps of a suite.
+
+    This must be called once the poll strategies of the suite are set, as
+    it wraps the _run_test method of its tests, and the request method of
+    their HTTP client. Each poll attempt is a request of its step.
+
+    :returns: the SuiteMetrics the steps are recorded in.
+    """
+    metrics = SuiteMetrics(filename)
+    for test in test_suite:
+        _instrument_test(type(test), metrics.add_step(test.test_data['name']))
+    return metrics
+
+
+def attach(test_class_instance, metrics):
+    """Add the metrics of a suite to the details of a tempest test."""
+    name = 'gabbi-steps:%s' % metrics.filename
+    test_class_instance.addDetail(
+        name, content.text_content(metrics.format_report()))
+    test_class_instance.addDetail(
+        name + '.json', content.text_content(json.dumps(metrics.to_dict())))
@@ -0,0 +1,177 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tenant networks of the scenario test classes.
+
+Each scenario test class needs a network and a subnet for the servers of its
+Heat stack. By default they are created by the class in its own project and
+deleted by its resource_cleanup. With [telemetry] network_pool_size set, each
+test process instead creates a pool of shared networks with the configured
+admin credentials, leases them to the test classes and takes them back when
+the classes are done, and deletes them when it exits.
+
+Pool networks are described with the ID of the run that created them, made of
+the host name and the process ID. A process creating its pool first deletes
+the pool networks left behind by processes of the same host which are not
+running anymore.
+"""
+
+import atexit
+import os
+import socket
+import threading
+
+from oslo_log import log as logging
+from tempest import clients
+from tempest.common import credentials_factory
+from tempest import config
+from tempest.lib.common.utils import data_utils
+from tempest.lib import exceptions as lib_exc
+
+CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+POOL_PREFIX = 'telemetry-network-pool'
+
+
+class NetworkPool(object):
+    """A pool of shared network/subnet pairs owned by the admin project."""
+
+    def __init__(self, size):
+        self.size = size
+        self.run_id = '%s:%d' % (socket.gethostname(), os.getpid())
+        self.description = '%s run=%s' % (POOL_PREFIX, self.run_id)
+        self._manager = None
+        self._free = []
+        self._networks = []
+        self._lock = threading.Lock()
+
+    @property
+    def manager(self):
+        if self._manager is None:
+            self._manager = clients.Manager(
+                credentials_factory.get_configured_admin_credentials())
+        return self._manager
+
+    def _create(self):
+        network = self.manager.networks_client.create_network(
+            name=data_utils.rand_name(
+                prefix=CONF.resource_name_prefix, name=POOL_PREFIX),
+            description=self.description,
+            shared=True)['network']
+        try:
+            subnet = self.manager.subnets_client.create_subnet(
+                ip_version=4,
+                network_id=network['id'],
+                cidr=CONF.network.project_network_cidr)['subnet']
+        except Exception:
+            self._delete(network['id'])
+            raise
+        self._networks.append(network['id'])
+        return network['id'], subnet['id']
+
+    def _delete(self, network_id):
+        try:
+            self.manager.networks_client.delete_network(network_id)
+        except lib_exc.NotFound:
+            pass
+        except lib_exc.Conflict:
+            LOG.warning("Network %s still has ports, not deleting it",
+                        network_id)
+
+    def _reclaim(self):
+        hostname = socket.gethostname()
+        networks = self.manager.networks_client.list_networks(
+            shared=True)['networks']
+        for network in networks:
+            description = network.get('description') or ''
+            if not description.startswith(POOL_PREFIX + ' run='):
+                continue
+            host, _, pid = description.split('=', 1)[1].rpartition(':')
+            if host != hostname or not pid.isdigit():
+                continue
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                LOG.info("Deleting network %s of the crashed run %s:%s",
+                         network['id'], host, pid)
+                self._delete(network['id'])
+            except PermissionError:
+                # The process exists but belongs to another user
+                pass
+
+    def _fill(self):
+        self._reclaim()
+        atexit.register(self.close)
+        for _ in range(self.size):
+            self._free.append(self._create())
+
+    def lease(self):
+        """Return the (network id, subnet id) of a free pool network."""
+        with self._lock:
+            if not self._networks:
+                self._fill()
+            if self._free:
+                return self._free.pop()
+            # More classes than pool networks at the same time
+            return self._create()
+
+    def release(self, network_id, subnet_id):
+        with self._lock:
+            self._free.append((network_id, subnet_id))
+
+    def close(self):
+        with self._lock:
+            for network_id in self._networks:
+                self._delete(network_id)
+            self._networks = []
+            self._free = []
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = NetworkPool(CONF.telemetry.network_pool_size)
+    return _POOL
+
+
+def lease_network(test_class):
+    """Return a (network id, subnet id) pair for a scenario test class.
+
+    The network is taken from the network pool if [telemetry]
+    network_pool_size is set, and is otherwise created in the project of the
+    primary credentials of the class.
+    """
+    if CONF.telemetry.network_pool_size:
+        return _get_pool().lease()
+    network_id = test_class.os_primary.networks_client.create_network(
+    )['network']['id']
+    subnet_id = test_class.os_primary.subnets_client.create_subnet(
+        ip_version=4,
+        network_id=network_id,
+        cidr=CONF.network.project_network_cidr
+    )['subnet']['id']
+    return network_id, subnet_id
+
+
+def release_network(test_class, network_id, subnet_id):
+    """Give back a network returned by lease_network."""
+    if CONF.telemetry.network_pool_size:
+        _get_pool().release(network_id, subnet_id)
+        return
+    test_class.os_primary.subnets_client.delete_subnet(subnet_id)
+    test_class.os_primary.networks_client.delete_network(network_id)
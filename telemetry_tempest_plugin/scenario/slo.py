@@ -0,0 +1,154 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Latencies of the autoscaling scenarios.
+
+The autoscaling YAML files only check that the stack eventually scales out
+and in. This measures how long each stage of the loop took, from the step
+metrics of the run:
+
+* sample_visible: from the boot of the first server, which starts loading
+  its CPU, to the first CPU sample being queryable in the metric backend
+* alarm: from that sample to the transition of the cpu_alarm_high alarm to
+  the alarm state, as found in the alarm history
+* scale_out: from that transition to the second server being active
+* scale_in: from the end of the CPU load of the last server to the stack
+  being back to one server
+
+Server boot times and alarm transitions are timestamps of Nova and Aodh,
+the other ones are taken by the test, so these intervals include the clock
+skew between the test node and the services.
+"""
+
+import datetime
+import json
+
+from oslo_log import log as logging
+from oslo_utils import timeutils
+from tempest import config
+from testtools import content
+
+CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+INTERVALS = ('sample_visible', 'alarm', 'scale_out', 'scale_in')
+
+STACK_CREATED_STEP = 'control stack status'
+SAMPLE_VISIBLE_STEP = 'check cpu sample visible'
+SCALED_OUT_STEP = 'list servers grow'
+ALARM_HISTORY_STEP = 'get cpu_alarm_high history'
+SCALED_IN_STEP = 'list servers shrink'
+
+
+def _timestamp(value):
+    # Nova and Aodh give naive UTC times
+    dt = timeutils.normalize_time(timeutils.parse_isotime(value))
+    return dt.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def _finished_at(metrics, name):
+    step = metrics.get_step(name)
+    if step is None or step.outcome != 'success':
+        return None
+    return step.finished_at
+
+
+def _launch_times(metrics):
+    step = metrics.get_step(SCALED_OUT_STEP)
+    if step is None or not isinstance(step.response, dict):
+        return []
+    return sorted(_timestamp(server['OS-SRV-USG:launched_at'])
+                  for server in step.response.get('servers', [])
+                  if server.get('OS-SRV-USG:launched_at'))
+
+
+def _alarm_time(metrics):
+    step = metrics.get_step(ALARM_HISTORY_STEP)
+    if step is None or not isinstance(step.response, list):
+        return None
+    times = []
+    for change in step.response:
+        if change.get('type') != 'state transition':
+            continue
+        try:
+            state = json.loads(change['detail']).get('state')
+        except (KeyError, TypeError, ValueError):
+            continue
+        if state == 'alarm':
+            times.append(_timestamp(change['timestamp']))
+    return min(times) if times else None
+
+
+def autoscaling_timeline(metrics, load_length):
+    """Return the times of the events of an autoscaling run.
+
+    :param metrics: the SuiteMetrics of an autoscaling YAML file.
+    :param load_length: the seconds each server loads its CPU after boot.
+    :returns: a dict of epoch timestamps, None for unknown events.
+    """
+    launch_times = _launch_times(metrics)
+    load_start = (launch_times[0] if launch_times
+                  else _finished_at(metrics, STACK_CREATED_STEP))
+    load_stop = launch_times[-1] + load_length if launch_times else None
+    return {
+        'load_start': load_start,
+        'sample_visible': _finished_at(metrics, SAMPLE_VISIBLE_STEP),
+        'alarm': _alarm_time(metrics),
+        'scaled_out': _finished_at(metrics, SCALED_OUT_STEP),
+        'load_stop': load_stop,
+        'scaled_in': _finished_at(metrics, SCALED_IN_STEP),
+    }
+
+
+def autoscaling_intervals(timeline):
+    """Return the seconds each stage of an autoscaling run took, or None."""
+    def interval(start, end):
+        if timeline[start] is None or timeline[end] is None:
+            return None
+        return timeline[end] - timeline[start]
+
+    return {
+        'sample_visible': interval('load_start', 'sample_visible'),
+        'alarm': interval('sample_visible', 'alarm'),
+        'scale_out': interval('alarm', 'scaled_out'),
+        'scale_in': interval('load_stop', 'scaled_in'),
+    }
+
+
+def check_autoscaling(test, metrics, load_length):
+    """Report the latencies of an autoscaling run and check its SLOs.
+
+    The intervals are added to the details of the test. Those exceeding
+    their threshold in [telemetry] autoscaling_slos are returned.
+
+    :returns: a list of SLO violation messages.
+    """
+    timeline = autoscaling_timeline(metrics, load_length)
+    intervals = autoscaling_intervals(timeline)
+    LOG.info("Autoscaling latencies of %s: %s", metrics.filename,
+             ', '.join('%s=%s' % (name, '-' if intervals[name] is None
+                                  else '%.1fs' % intervals[name])
+                       for name in INTERVALS))
+    test.addDetail('autoscaling-slo:%s.json' % metrics.filename,
+                   content.text_content(json.dumps({
+                       'timeline': timeline, 'intervals': intervals})))
+
+    violations = []
+    for name, threshold in sorted(CONF.telemetry.autoscaling_slos.items()):
+        if name not in intervals:
+            violations.append("Unknown autoscaling SLO %s, expected one of "
+                              "%s" % (name, ', '.join(INTERVALS)))
+        elif intervals[name] is not None and intervals[name] > threshold:
+            violations.append("Autoscaling %s took %.1fs, more than the "
+                              "%.1fs SLO" % (name, intervals[name],
+                                             threshold))
+    return violations
@@ -0,0 +1,180 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Deletion of the Heat stacks of the scenario test classes.
+
+The stack of a scenario test class is deleted by its resource_cleanup, then
+its network is given back and its credentials are cleared. Deleting a stack
+takes up to a minute. With [telemetry] async_stack_cleanup set, these steps
+run in the background and the test process moves on to its next test class.
+It only waits for the pending deletions when it exits.
+
+Once its stack is deleted, the other stacks of the project with the exact
+name of its stack, like one whose deletion failed before, are deleted too,
+so they do not outlive the class. Stacks of other classes and workers
+sharing the project are left alone.
+"""
+
+import atexit
+from concurrent import futures
+import threading
+import time
+
+from oslo_log import log as logging
+import requests
+from requests import adapters
+from tempest import config
+
+CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+MAX_POLL_DELAY = 10
+CLEANUP_WORKERS = 4
+
+
+class StackReaper(object):
+    """Deletes Heat stacks, in the background if asked to."""
+
+    def __init__(self, workers):
+        self.session = requests.Session()
+        adapter = adapters.HTTPAdapter(pool_connections=workers,
+                                       pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.verify = (
+            not CONF.telemetry.disable_ssl_certificate_validation)
+        self._executor = futures.ThreadPoolExecutor(max_workers=workers)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _wait_for_deletion(self, stack_url, headers):
+        deadline = time.time() + CONF.telemetry.stack_delete_timeout
+        delay = 0.5
+        while True:
+            r = self.session.get(stack_url, headers=headers)
+            if r.status_code == 404:
+                return
+            if r.status_code != 200:
+                LOG.warning("Failed to get the status of stack %s: %s %s",
+                            stack_url, r.status_code, r.text)
+                return
+            if r.json()["stack"]["stack_status"] != "DELETE_IN_PROGRESS":
+                return
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                LOG.warning("Stack %s still being deleted after %d seconds",
+                            stack_url, CONF.telemetry.stack_delete_timeout)
+                return
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, MAX_POLL_DELAY)
+
+    def _delete(self, heat_service_url, stack, headers):
+        stack_url = (f'{heat_service_url}/stacks/'
+                     f'{stack["stack_name"]}/{stack["id"]}')
+        self.session.delete(stack_url, headers=headers)
+        self._wait_for_deletion(stack_url, headers)
+
+    def delete_stacks(self, heat_service_url, auth_provider, stack_name):
+        """Delete a stack, then the other stacks with the same name."""
+        headers = {'X-Auth-Token': auth_provider.get_token()}
+        r = self.session.get(heat_service_url + "/stacks/" + stack_name,
+                             headers=headers)
+        if r.status_code == 200:
+            self._delete(heat_service_url, r.json()["stack"], headers)
+        elif r.status_code != 404:
+            LOG.warning("Failed to get stack %s: %s %s",
+                        stack_name, r.status_code, r.text)
+
+        r = self.session.get(heat_service_url + "/stacks",
+                             params={'stack_name': stack_name},
+                             headers=headers)
+        if r.status_code != 200:
+            LOG.warning("Failed to list the stacks named %s: %s %s",
+                        stack_name, r.status_code, r.text)
+            return
+        for stack in r.json().get("stacks", []):
+            if (stack["stack_name"] == stack_name
+                    and stack["stack_status"] != "DELETE_COMPLETE"):
+                LOG.info("Deleting orphaned stack %s", stack["stack_name"])
+                self._delete(heat_service_url, stack, headers)
+
+    def _run_steps(self, steps):
+        for step in steps:
+            try:
+                step()
+            except Exception:
+                LOG.exception("Background cleanup step %s failed", step)
+
+    def submit(self, steps):
+        """Run the cleanup steps one after the other in the background."""
+        future = self._executor.submit(self._run_steps, steps)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def join(self):
+        with self._lock:
+            pending = len(self._pending)
+        if pending:
+            LOG.info("Waiting for %d pending stack cleanups", pending)
+        self._executor.shutdown(wait=True)
+
+
+_REAPER = None
+_REAPER_LOCK = threading.Lock()
+
+
+def _get_reaper():
+    global _REAPER
+    with _REAPER_LOCK:
+        if _REAPER is None:
+            _REAPER = StackReaper(CLEANUP_WORKERS)
+            if CONF.telemetry.async_stack_cleanup:
+                atexit.register(_REAPER.join)
+    return _REAPER
+
+
+def cleanup(test_class, steps):
+    """Delete the stack of a scenario test class, then run other steps.
+
+    The stack is the one named test_class.stack_name, which is looked up
+    through test_class.heat_service_url with the primary credentials of the
+    class. Nothing is deleted if test_class.heat_service_url is None, which
+    means no test of the class ran. The steps are callables run after the
+    stack is deleted.
+    """
+    reaper = _get_reaper()
+    if test_class.heat_service_url:
+        steps = [lambda: reaper.delete_stacks(
+            test_class.heat_service_url, test_class.os_primary.auth_provider,
+            test_class.stack_name)] + list(steps)
+    if CONF.telemetry.async_stack_cleanup:
+        test_class._stack_cleanup = reaper.submit(steps)
+    else:
+        for step in steps:
+            step()
+
+
+def after_cleanup(test_class, func):
+    """Call func once the steps given to cleanup for the class are done."""
+    future = getattr(test_class, '_stack_cleanup', None)
+    if future is None:
+        func()
+        return
+    test_class._stack_cleanup = None
+    future.add_done_callback(
+        lambda _: _get_reaper()._run_steps([func]))
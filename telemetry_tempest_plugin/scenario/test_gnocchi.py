@@ -15,6 +15,7 @@ import os
 from tempest import config
 import tempest.test
 
+from telemetry_tempest_plugin.common import catalog
 from telemetry_tempest_plugin.scenario import utils
 
 CONF = config.CONF
@@ -27,6 +28,8 @@ class GnocchiGabbiTest(tempest.test.BaseTestCase):
 
     TIMEOUT_SCALING_FACTOR = 5
 
+    SERVICE_URL_VARIABLES = {'metric': 'GNOCCHI_SERVICE_URL'}
+
     @classmethod
     def skip_checks(cls):
         super(GnocchiGabbiTest, cls).skip_checks()
@@ -35,16 +38,14 @@ class GnocchiGabbiTest(tempest.test.BaseTestCase):
 
     def _prep_test(self, filename):
         token = self.os_admin.auth_provider.get_token()
-        url = self.os_admin.auth_provider.base_url(
-            {'service': CONF.metric.catalog_type,
-             'endpoint_type': CONF.metric.endpoint_type,
-             'region': CONF.identity.region})
+        url = catalog.get_endpoint(self.os_admin.auth_provider, 'metric',
+                                   region=CONF.identity.region)
 
-        os.environ.update({
+        return {
             "GNOCCHI_SERVICE_URL": url,
             "GNOCCHI_SERVICE_TOKEN": token,
             "GNOCCHI_AUTHORIZATION": "not used",
-        })
+        }
 
 
 utils.generate_tests(GnocchiGabbiTest, TEST_DIR)
@@ -10,14 +10,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
 import os
-import time
 
-import requests
 from tempest import config
 from tempest.lib.common.utils import data_utils
 from tempest.scenario import manager
 
+from telemetry_tempest_plugin.common import catalog
+from telemetry_tempest_plugin.scenario import images
+from telemetry_tempest_plugin.scenario import networks
+from telemetry_tempest_plugin.scenario import slo
+from telemetry_tempest_plugin.scenario import stacks
 from telemetry_tempest_plugin.scenario import utils
 
 
@@ -30,17 +34,20 @@ class PrometheusGabbiTest(manager.ScenarioTest):
 
     TIMEOUT_SCALING_FACTOR = 5
 
+    SERVICE_URL_VARIABLES = {
+        'alarming_plugin': 'AODH_SERVICE_URL',
+        'heat_plugin': 'HEAT_SERVICE_URL',
+        'compute': 'NOVA_SERVICE_URL',
+        'prometheus': 'PROMETHEUS_SERVICE_URL',
+    }
+
     @classmethod
     def resource_setup(cls):
         cls.stack_name = data_utils.rand_name("telemetry")
-        networks = cls.os_primary.networks_client
-        subnets = cls.os_primary.subnets_client
-        cls.stack_network_id = networks.create_network()['network']['id']
-        cls.stack_subnet_id = subnets.create_subnet(
-            ip_version=4,
-            network_id=cls.stack_network_id,
-            cidr=config.CONF.network.project_network_cidr
-        )['subnet']['id']
+        cls.heat_service_url = None
+        cls.stack_network_id = None
+        cls.stack_network_id, cls.stack_subnet_id = networks.lease_network(
+            cls)
 
     @classmethod
     def skip_checks(cls):
@@ -55,54 +62,23 @@ class PrometheusGabbiTest(manager.ScenarioTest):
             raise cls.skipException("%s support is required" %
                                     name.capitalize())
 
-    @staticmethod
-    def _get_endpoint(auth, service):
-        opt_section = getattr(config.CONF, service)
-        endpoint_type = opt_section.endpoint_type
-        if endpoint_type.endswith("URL"):
-            endpoint_type = endpoint_type[:-3]
-        catalog = auth[1]['catalog']
-        endpoints = [e['endpoints'] for e in catalog
-                     if e['type'] == opt_section.catalog_type]
-        if not endpoints:
-            raise Exception("%s endpoint not found" %
-                            opt_section.catalog_type)
-        endpoints = [e['url'] for e in endpoints[0]
-                     if e['interface'] == endpoint_type]
-        if not endpoints:
-            raise Exception("%s interface not found for endpoint %s" %
-                            (endpoint_type,
-                             opt_section.catalog_type))
-        return endpoints[0].rstrip('/')
-
     @classmethod
     def resource_cleanup(cls):
-        if 'HEAT_SERVICE_URL' in os.environ:
-            headers = {
-                'X-Auth-Token': cls.os_primary.auth_provider.get_auth()[0]}
-            url = os.environ['HEAT_SERVICE_URL'] + "/stacks/" + cls.stack_name
-            r = requests.get(url, headers=headers)
-
-            if r.status_code == 200 and \
-                    "stack" in r.json():
-                stack = r.json()["stack"]
-                stack_url = (f'{os.environ["HEAT_SERVICE_URL"]}/stacks/'
-                             f'{stack["stack_name"]}/{stack["id"]}')
-                requests.delete(stack_url, headers=headers)
-
-                repeats = 0
-                r = requests.get(stack_url, headers=headers)
-                while r.json()["stack"]["stack_status"] == \
-                        "DELETE_IN_PROGRESS" and repeats < 30:
-                    time.sleep(2)
-                    r = requests.get(stack_url, headers=headers)
-                    repeats += 1
-
-            cls.os_primary.subnets_client.delete_subnet(cls.stack_subnet_id)
-            cls.os_primary.networks_client.delete_network(cls.stack_network_id)
-
+        steps = []
+        if cls.stack_network_id:
+            steps.append(functools.partial(
+                networks.release_network, cls, cls.stack_network_id,
+                cls.stack_subnet_id))
+        stacks.cleanup(cls, steps)
         super(PrometheusGabbiTest, cls).resource_cleanup()
 
+    @classmethod
+    def clear_credentials(cls):
+        # The stack and the network of the class may still be deleted in the
+        # background with these credentials
+        stacks.after_cleanup(
+            cls, super(PrometheusGabbiTest, cls).clear_credentials)
+
     def _prep_query(self, prometheus_rate_duration, resource_prefix):
         if config.CONF.telemetry.autoscaling_instance_grouping == "metadata":
             query = ("\"(rate(ceilometer_cpu{{server_group=~'stack_id'}}"
@@ -125,8 +101,18 @@ class PrometheusGabbiTest(manager.ScenarioTest):
             '''.format(resource_prefix, prometheus_rate_duration)
             return prefix_query
 
+    def _prep_sample_query(self, resource_prefix):
+        # Selects the CPU samples of the servers of the stack the same way
+        # as the alarm query. gabbi substitutes $ENVIRON before $RESPONSE,
+        # so the stack id is taken from the response of the step checking
+        # the stack status.
+        if config.CONF.telemetry.autoscaling_instance_grouping == "metadata":
+            return "ceilometer_cpu{server_group=~\"$RESPONSE['$.stack.id']\"}"
+        return 'ceilometer_cpu{resource_name=~"te-%s.*"}' % resource_prefix
+
     def _prep_test(self, filename):
-        auth = self.os_primary.auth_provider.get_auth()
+        auth_provider = self.os_primary.auth_provider
+        auth = auth_provider.get_auth()
         # NOTE(marihan): This is being used in prometheus query as heat is
         # using the last 7 digits from stack_name to create the autoscaling
         # resources.
@@ -135,28 +121,40 @@ class PrometheusGabbiTest(manager.ScenarioTest):
             config.CONF.telemetry.ceilometer_polling_interval
             + config.CONF.telemetry.prometheus_scrape_interval)
         query = self._prep_query(prometheus_rate_duration, resource_prefix)
-        os.environ.update({
+        # resource_cleanup deletes the stack through this endpoint
+        self.__class__.heat_service_url = catalog.get_endpoint(
+            auth_provider, "heat_plugin")
+        return {
             "USER_TOKEN": auth[0],
             "AODH_THRESHOLD": str(config.CONF.telemetry.alarm_threshold),
             "SCALEDOWN_THRESHOLD":
             str(config.CONF.telemetry.scaledown_alarm_threshold),
-            "AODH_SERVICE_URL": self._get_endpoint(auth, "alarming_plugin"),
-            "HEAT_SERVICE_URL": self._get_endpoint(auth, "heat_plugin"),
-            "NOVA_SERVICE_URL": self._get_endpoint(auth, "compute"),
+            "AODH_SERVICE_URL": catalog.get_endpoint(
+                auth_provider, "alarming_plugin"),
+            "HEAT_SERVICE_URL": self.__class__.heat_service_url,
+            "NOVA_SERVICE_URL": catalog.get_endpoint(
+                auth_provider, "compute"),
             "SG_CORE_SERVICE_URL":
             config.CONF.telemetry.sg_core_service_url,
             "CEILOMETER_POLLING_INTERVAL":
             str(config.CONF.telemetry.ceilometer_polling_interval),
             "PROMETHEUS_SERVICE_URL":
             config.CONF.telemetry.prometheus_service_url,
-            "GLANCE_IMAGE_NAME": self.image_create(),
+            "GLANCE_IMAGE_NAME": images.get_image(self),
             "NOVA_FLAVOR_REF": config.CONF.compute.flavor_ref,
             "NEUTRON_NETWORK": self.stack_network_id,
             "STACK_NAME": self.stack_name,
             "RESOURCE_PREFIX": resource_prefix,
             "LOAD_LENGTH": str(prometheus_rate_duration * 2),
             "QUERY": query,
-        })
+            "CPU_SAMPLE_QUERY": self._prep_sample_query(resource_prefix),
+        }
+
+    def _check_gabbi_metrics(self, filename, environ, metrics):
+        if filename != 'autoscaling.yaml':
+            return []
+        return slo.check_autoscaling(self, metrics,
+                                     int(environ['LOAD_LENGTH']))
 
 
 utils.generate_tests(PrometheusGabbiTest, TEST_DIR)
@@ -10,21 +10,250 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from concurrent import futures
+import copy
+import hashlib
+import io
 import os
+import pickle
+import random
+import tempfile
+import time
 import unittest
+from urllib import parse
 
-from gabbi import runner
-from gabbi import suitemaker
-from gabbi import utils
-from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_utils import importutils
+from tempest import config
+
+from telemetry_tempest_plugin.scenario import instrumentation
 
 LOG = logging.getLogger(__name__)
-CONF = cfg.CONF
+CONF = config.CONF
+
+# Parsed yaml files by path, along with the mtime and size they had
+_SUITE_DICTS = {}
+
+
+def _load_yaml(content):
+    # gabbi is only imported by the functions running the tests. It takes
+    # a while to import, and tempest imports every test module when
+    # discovering tests, even those that are not going to run.
+    from gabbi import utils
+
+    return utils.load_yaml(handle=io.BytesIO(content))
+
+
+def _parse_yaml(content):
+    cache_dir = CONF.telemetry.gabbi_cache_dir
+    if not cache_dir:
+        return _load_yaml(content)
+
+    path = os.path.join(cache_dir, '%s.pickle' %
+                        hashlib.sha256(content).hexdigest())
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, EOFError, pickle.UnpicklingError) as e:
+        LOG.warning("Ignoring unreadable gabbi cache file %s: %s", path, e)
+
+    suite_dict = _load_yaml(content)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Other workers may read the cache while we write it
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(suite_dict, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        LOG.warning("Unable to write gabbi cache file %s: %s", path, e)
+    return suite_dict
+
+
+def load_suite_dict(path):
+    """Load a gabbi yaml file, parsing it only once.
+
+    Parsed files are kept for the life of the process and parsed again
+    only if their modification time or size change. When
+    [telemetry] gabbi_cache_dir is set, they are also stored there, keyed
+    by the sha256 of their content, so later runs skip the YAML parsing.
+
+    A copy is returned, so callers are free to modify it.
+    """
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _SUITE_DICTS.get(path)
+    if cached is None or cached[0] != version:
+        with open(path, 'rb') as f:
+            cached = (version, _parse_yaml(f.read()))
+        _SUITE_DICTS[path] = cached
+    return copy.deepcopy(cached[1])
+
+
+def _run_test_with_backoff(self):
+    """Run a gabbi test, polling with exponential backoff and jitter.
+
+    This replaces HTTPTestCase._run_test for tests declaring
+    ``poll: {strategy: backoff}``. The first retry happens after ``delay``
+    seconds, each following one waits ``factor`` times longer, up to
+    ``max_delay``, with a random jitter of up to half the wait. Polling
+    stops when ``timeout`` seconds of wall-clock time have elapsed,
+    defaulting to ``count * delay`` so fixed polls can be converted
+    without changing their overall budget.
+    """
+    from gabbi import case
+    from gabbi import utils
+    import httpx
+
+    # These are the errors gabbi itself retries on when polling.
+    retry_exceptions = (AssertionError, utils.ConnectionRefused,
+                        httpx.ReadTimeout)
+
+    poll = self.test_data['poll']
+    delay = float(self.replace_template(poll.get('delay', 1)))
+    max_delay = float(self.replace_template(poll.get('max_delay', 30)))
+    factor = float(self.replace_template(poll.get('factor', 2)))
+    if 'timeout' in poll:
+        timeout = float(self.replace_template(poll['timeout']))
+    else:
+        count = int(float(self.replace_template(poll.get('count', 1))))
+        timeout = count * delay
+
+    deadline = time.monotonic() + timeout
+    attempts = 0
+    # Let gabbi run the request a single time per attempt, we
+    # take care of the retries.
+    self.test_data['poll'] = {}
+    try:
+        while True:
+            attempts += 1
+            try:
+                return case.HTTPTestCase._run_test(self)
+            except retry_exceptions:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    LOG.debug("Giving up polling %s after %d attempts",
+                              self.test_data['name'], attempts)
+                    raise
+            time.sleep(min(remaining, delay * random.uniform(0.5, 1)))
+            delay = min(delay * factor, max_delay)
+    finally:
+        self.test_data['poll'] = poll
+
+
+def set_poll_strategies(test_suite):
+    """Install the poll strategy requested by each test of a suite.
+
+    gabbi builds one class per test, so overriding the method on the
+    class only affects that test.
+    """
+    for test in test_suite:
+        strategy = test.test_data['poll'].get('strategy', 'fixed')
+        if strategy == 'backoff':
+            type(test)._run_test = _run_test_with_backoff
+        elif strategy != 'fixed':
+            raise ValueError("Unknown poll strategy '%s' in test '%s'" %
+                             (strategy, test.test_data['name']))
+
+
+def set_environ(test_suite, environ):
+    """Make the tests of a suite read $ENVIRON from a private mapping.
+
+    Scenario classes return this mapping from their _prep_test method.
+    This lets several suites run at the same time in one process, each
+    with its own tokens, URLs and names, instead of sharing os.environ.
+    """
+    def _environ_replacer(self, match):
+        environ_name = match.group('arg1') or match.group('arg2')
+        self.cast = match.group('cast')
+        return environ[environ_name]
+
+    for test in test_suite:
+        type(test)._environ_replacer = _environ_replacer
+
+
+def _intercept_dispatcher(apps):
+    """Return a WSGI app passing each request to the app of its service.
+
+    :param apps: a list of (service URL, WSGI app) pairs. Requests whose URL
+                 starts with a service URL go to its app, mounted on the
+                 path of the URL.
+    """
+    routes = []
+    for url, app in apps:
+        parts = parse.urlsplit(url)
+        routes.append((parts.scheme, parts.netloc.lower(),
+                       parts.path.rstrip('/'), app))
+    # Longest paths first, for services sharing a host
+    routes.sort(key=lambda route: len(route[2]), reverse=True)
+
+    def dispatch(environ, start_response):
+        scheme = environ['wsgi.url_scheme']
+        host = environ.get('HTTP_HOST', '').lower()
+        path = environ.get('SCRIPT_NAME', '') + environ.get('PATH_INFO', '')
+        for r_scheme, r_host, r_path, app in routes:
+            if ((scheme, host) == (r_scheme, r_host)
+                    and (path == r_path or path.startswith(r_path + '/'))):
+                environ = dict(environ, SCRIPT_NAME=r_path,
+                               PATH_INFO=path[len(r_path):])
+                return app(environ, start_response)
+        start_response('502 Bad Gateway', [('Content-Type', 'text/plain')])
+        return [('No intercept for %s://%s%s' %
+                 (scheme, host, path)).encode('utf-8')]
 
+    return dispatch
 
-def run_test(test_class_instance, test_dir, filename):
-    d = utils.load_yaml(yaml_file=os.path.join(test_dir, filename))
+
+def get_intercept(service_urls):
+    """Return the gabbi intercept of a suite, if its services have one.
+
+    [telemetry] gabbi_intercepts maps the configuration section names of
+    services to WSGI app factories. All the requests of an intercepted
+    suite go to these apps instead of the network, so a suite is only
+    intercepted if all the services it talks to are.
+
+    :param service_urls: a dict mapping the configuration section names of
+                         the services a suite talks to, to their URLs.
+    :returns: a WSGI app factory, or None.
+    """
+    factories = CONF.telemetry.gabbi_intercepts
+    if not service_urls or not set(service_urls).issubset(factories):
+        return None
+    apps = [(url, importutils.import_class(factories[service]))
+            for service, url in service_urls.items()]
+
+    def intercept():
+        return _intercept_dispatcher(
+            [(url, factory()) for url, factory in apps])
+
+    return intercept
+
+
+def _class_intercept(test_class_instance, test_dir, filename, environ):
+    # Scenario classes map the services they talk to, to the variable of
+    # their _prep_test holding their URL. Only the services whose variable
+    # is used by the yaml file count.
+    variables = getattr(test_class_instance, 'SERVICE_URL_VARIABLES', {})
+    if not CONF.telemetry.gabbi_intercepts or not variables:
+        return None
+    with open(os.path.join(test_dir, filename)) as f:
+        content = f.read()
+    return get_intercept({service: environ[variable]
+                          for service, variable in variables.items()
+                          if variable in content})
+
+
+def _run_suite(test_dir, filename, environ=None, intercept=None):
+    """Run the tests of a yaml file.
+
+    :returns: a (unittest result, SuiteMetrics) tuple.
+    """
+    from gabbi import runner
+    from gabbi import suitemaker
+
+    d = load_suite_dict(os.path.join(test_dir, filename))
     cert_validate = not CONF.telemetry.disable_ssl_certificate_validation
     if 'defaults' in d:
         d['defaults']['cert_validate'] = cert_validate
@@ -37,9 +266,13 @@ def run_test(test_class_instance, test_dir, filename):
         test_directory=test_dir,
         host='example.com', port=None,
         fixture_module=None,
-        intercept=None,
+        intercept=intercept,
         handlers=runner.initialize_handlers([], []),
         test_loader_name="tempest")
+    set_poll_strategies(test_suite)
+    if environ is not None:
+        set_environ(test_suite, environ)
+    metrics = instrumentation.instrument(test_suite, filename)
 
     # NOTE(sileht): We hide stdout/stderr and reraise the failure
     # manually, tempest will print it ittest_class.
@@ -47,35 +280,135 @@ def run_test(test_class_instance, test_dir, filename):
         result = unittest.TextTestRunner(
             stream=stream, verbosity=0, failfast=True,
         ).run(test_suite)
+    return result, metrics
+
+
+def _first_failure(result):
+    failures = (result.errors + result.failures
+                + result.unexpectedSuccesses)
+    if failures:
+        test, bt = failures[0]
+        name = test.test_data.get('name', test.id())
+        return 'From test "%s" :\n%s' % (name, bt)
+
+
+def _check_metrics(test_class_instance, filename, environ, metrics):
+    # Scenario classes may analyse the metrics of the steps of their yaml
+    # files with a _check_gabbi_metrics method, which returns the reasons to
+    # fail the test. It is called even if the tests of the file failed, to
+    # report what can be.
+    check = getattr(test_class_instance, '_check_gabbi_metrics', None)
+    if check is None:
+        return []
+    return check(filename, environ, metrics)
+
+
+def run_test(test_class_instance, test_dir, filename, environ=None,
+             intercept=None):
+    """Run the tests of a yaml file.
+
+    :param environ: the values of $ENVIRON in the tests.
+    :param intercept: a WSGI app factory all the requests of the tests are
+                      sent to, instead of the network.
+
+    The time spent in each test of the file, and the HTTP requests it sent,
+    are added to the details of test_class_instance.
+    """
+    result, metrics = _run_suite(test_dir, filename, environ, intercept)
+    instrumentation.attach(test_class_instance, metrics)
+    violations = _check_metrics(test_class_instance, filename, environ,
+                                metrics)
 
     if not result.wasSuccessful():
-        failures = (result.errors + result.failures
-                    + result.unexpectedSuccesses)
-        if failures:
-            test, bt = failures[0]
-            name = test.test_data.get('name', test.id())
-            msg = 'From test "%s" :\n%s' % (name, bt)
+        msg = _first_failure(result)
+        if msg:
             test_class_instance.fail(msg)
 
     test_class_instance.assertTrue(result.wasSuccessful())
+    if violations:
+        test_class_instance.fail('\n'.join(violations))
+
+
+def run_tests_concurrently(test_class_instance, test_dir, environs,
+                           concurrency, intercepts=None):
+    """Run several yaml files at the same time in a thread pool.
+
+    :param environs: a dict mapping each yaml file name to the environment
+                     its tests are run with.
+    :param concurrency: the maximum number of suites running at once.
+    :param intercepts: a dict mapping yaml file names to the intercept
+                       their tests are run with.
+    """
+    intercepts = intercepts or {}
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = {
+            filename: executor.submit(_run_suite, test_dir, filename,
+                                      environ, intercepts.get(filename))
+            for filename, environ in environs.items()}
+
+    msgs = []
+    for filename, future in sorted(results.items()):
+        result, metrics = future.result()
+        instrumentation.attach(test_class_instance, metrics)
+        violations = _check_metrics(test_class_instance, filename,
+                                    environs[filename], metrics)
+        if not result.wasSuccessful():
+            msgs.append('In %s %s' % (
+                filename, _first_failure(result) or 'unknown failure'))
+        elif violations:
+            msgs.append('In %s:\n%s' % (filename, '\n'.join(violations)))
+    if msgs:
+        test_class_instance.fail('\n\n'.join(msgs))
 
 
-def test_maker(test_dir, filename, name):
+def test_maker(test_dir, filename, name, intercept=None):
     def test(self):
-        self._prep_test(filename)
-        run_test(self, test_dir, filename)
+        environ = self._prep_test(filename)
+        run_test(self, test_dir, filename, environ,
+                 intercept or _class_intercept(
+                     self, test_dir, filename, environ))
     test.__name__ = name
     return test
 
 
-def generate_tests(test_class, test_dir):
+def concurrent_test_maker(test_dir, filenames, name, concurrency,
+                          intercept=None):
+    def test(self):
+        environs = {}
+        intercepts = {}
+        for filename in filenames:
+            environs[filename] = self._prep_test(filename)
+            intercepts[filename] = intercept or _class_intercept(
+                self, test_dir, filename, environs[filename])
+        run_tests_concurrently(self, test_dir, environs, concurrency,
+                               intercepts)
+    test.__name__ = name
+    return test
+
+
+def generate_tests(test_class, test_dir, intercept=None):
+    """Add a test running each yaml file of a directory to a test class.
+
+    :param intercept: a WSGI app factory all the requests of the tests are
+                      sent to. By default, the tests of a file are
+                      intercepted if all the services of
+                      test_class.SERVICE_URL_VARIABLES it uses are in
+                      [telemetry] gabbi_intercepts.
+    """
     # Create one scenario per yaml file
     filenames = os.listdir(test_dir)
     if not filenames:
         raise RuntimeError("%s is empty" % test_dir)
+    filenames = sorted(f for f in filenames if f.endswith('.yaml'))
+    concurrency = CONF.telemetry.scenario_concurrency
+    if concurrency > 1 and len(filenames) > 1:
+        # Run all the yaml files of the class from a single scenario
+        name = "test_concurrent_gabbits"
+        setattr(test_class, name,
+                concurrent_test_maker(test_dir, filenames, name,
+                                      concurrency, intercept))
+        return
     for filename in filenames:
-        if not filename.endswith('.yaml'):
-            continue
         name = "test_%s" % filename[:-5].lower().replace("-", "_")
         setattr(test_class, name,
-                test_maker(test_dir, filename, name))
+                test_maker(test_dir, filename, name, intercept))
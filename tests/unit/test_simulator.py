@@ -0,0 +1,186 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+import json
+from unittest import mock
+from urllib import parse
+
+import testtools
+
+from telemetry_tempest_plugin.aodh import simulator
+
+
+class TestAodhSimulator(testtools.TestCase):
+
+    def setUp(self):
+        super(TestAodhSimulator, self).setUp()
+        self.app = simulator.AodhSimulator(admin_tokens=['admin'])
+
+    def request(self, method, path, body=None, query=None, token='user'):
+        data = json.dumps(body).encode('utf-8') if body is not None else b''
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': parse.urlencode(query or [], doseq=True),
+            'CONTENT_LENGTH': str(len(data)),
+            'wsgi.input': io.BytesIO(data),
+            'wsgi.url_scheme': 'http',
+            'HTTP_X_AUTH_TOKEN': token,
+        }
+        response = []
+
+        def start_response(status, headers, exc_info=None):
+            response.append(status)
+
+        body = b''.join(self.app(environ, start_response))
+        return int(response[0].split()[0]), json.loads(body) if body else None
+
+    def alarm(self, **kwargs):
+        alarm = {
+            'name': 'alarm',
+            'type': 'event',
+            'event_rule': {},
+        }
+        alarm.update(kwargs)
+        return alarm
+
+    def create(self, token='user', **kwargs):
+        status, body = self.request('POST', '/v2/alarms',
+                                    self.alarm(**kwargs), token=token)
+        self.assertEqual(201, status, body)
+        return body
+
+    def assertBadRequest(self, alarm, message):
+        status, body = self.request('POST', '/v2/alarms', alarm)
+        self.assertEqual(400, status)
+        self.assertIn(message, body['error_message']['faultstring'])
+
+    def test_create_and_get(self):
+        alarm = self.create(name='foo', severity='critical')
+        status, body = self.request('GET', '/v2/alarms/%s' % alarm['alarm_id'])
+        self.assertEqual(200, status)
+        self.assertEqual(alarm, body)
+        self.assertEqual('insufficient data', body['state'])
+
+    def test_invalid_alarms(self):
+        self.assertBadRequest(self.alarm(type='foo'),
+                              'field/attribute type')
+        self.assertBadRequest(self.alarm(name=''),
+                              'Mandatory field name is missing')
+        self.assertBadRequest(self.alarm(severity='foo'),
+                              'field/attribute severity')
+        self.assertBadRequest(
+            self.alarm(type='threshold', threshold_rule={}),
+            'Mandatory field threshold is missing')
+        self.assertBadRequest(
+            self.alarm(type='threshold',
+                       threshold_rule={'threshold': 1, 'granularity': -1}),
+            "granularity. Value: '-1'")
+        self.assertBadRequest(
+            self.alarm(ok_actions=['ftp://example.com']),
+            'Unsupported action')
+
+    def test_invalid_time_constraints(self):
+        constraint = {'name': 'c', 'start': '0 11 * * *'}
+        # a missing duration is rejected, not a server error
+        self.assertBadRequest(self.alarm(time_constraints=[constraint]),
+                              "duration. Value: 'None'")
+        constraint['duration'] = 10
+        self.assertBadRequest(
+            self.alarm(time_constraints=[constraint, constraint]),
+            'names must be unique')
+        self.assertBadRequest(
+            self.alarm(time_constraints=[dict(constraint, start='foo')]),
+            'Cron expression is not valid')
+        self.assertBadRequest(
+            self.alarm(time_constraints=[dict(constraint, timezone='foo')]),
+            'Timezone foo is not valid')
+        self.assertBadRequest(self.alarm(time_constraints=['foo']),
+                              'must be a JSON object')
+        self.create(time_constraints=[constraint])
+
+    def test_invalid_json(self):
+        status, body = self.request('POST', '/v2/alarms')
+        self.assertEqual(400, status)
+        self.assertIn('Invalid JSON body',
+                      body['error_message']['faultstring'])
+
+    def test_unexpected_error(self):
+        with mock.patch.object(self.app.store, 'list',
+                               side_effect=KeyError('foo')):
+            status, body = self.request('GET', '/v2/alarms')
+        self.assertEqual(500, status)
+        self.assertEqual('Server', body['error_message']['faultcode'])
+
+    def test_query(self):
+        foo = self.create(name='foo')
+        self.create(name='bar')
+        other = self.create(name='foo', token='other')
+
+        status, body = self.request('GET', '/v2/alarms',
+                                    query={'q.field': 'name',
+                                           'q.value': 'foo'})
+        self.assertEqual(200, status)
+        self.assertEqual([foo['alarm_id']], [a['alarm_id'] for a in body])
+
+        status, body = self.request(
+            'GET', '/v2/alarms', token='admin',
+            query={'q.field': ['name', 'all_projects'],
+                   'q.value': ['foo', 'true']})
+        self.assertEqual(200, status)
+        self.assertEqual({foo['alarm_id'], other['alarm_id']},
+                         {a['alarm_id'] for a in body})
+
+        status, body = self.request('GET', '/v2/alarms',
+                                    query={'q.field': 'all_projects',
+                                           'q.value': 'true'})
+        self.assertEqual(403, status)
+        status, body = self.request('GET', '/v2/alarms',
+                                    query={'q.field': 'foo',
+                                           'q.value': 'bar'})
+        self.assertEqual(400, status)
+
+    def test_sort_and_pagination(self):
+        names = ['c', 'a', 'd', 'b', 'e']
+        ids = dict((self.create(name=name)['alarm_id'], name)
+                   for name in names)
+
+        def walk(query):
+            alarms, marker = [], None
+            while True:
+                page = dict(query, limit=2)
+                if marker:
+                    page['marker'] = marker
+                status, body = self.request('GET', '/v2/alarms', query=page)
+                self.assertEqual(200, status)
+                self.assertLessEqual(len(body), 2)
+                if not body:
+                    return alarms
+                alarms.extend(ids[a['alarm_id']] for a in body)
+                marker = body[-1]['alarm_id']
+
+        # newest first without sort
+        self.assertEqual(list(reversed(names)), walk({}))
+        self.assertEqual(sorted(names), walk({'sort': 'name:asc'}))
+        self.assertEqual(sorted(names, reverse=True),
+                         walk({'sort': 'name:desc'}))
+
+        status, body = self.request('GET', '/v2/alarms',
+                                    query={'sort': 'foo:asc'})
+        self.assertEqual(400, status)
+        status, body = self.request('GET', '/v2/alarms',
+                                    query={'marker': 'foo'})
+        self.assertEqual(400, status)
+        status, body = self.request('GET', '/v2/alarms',
+                                    query={'limit': 0})
+        self.assertEqual(400, status)